@@ -1,577 +1,846 @@
 import discord
 import asyncio
-import json
 import os
-import re
 from datetime import datetime, timedelta
 import pytz
-from collections import defaultdict
+
+from alarms import MAX_ALARM_MINUTES, MAX_ALARMS_PER_USER, AlarmScheduler
+from board import BOARD_INTERVAL_SECONDS, BOARD_MAX_ROWS, ProgressBoard
+from bucketing import bucket_sessions, split_session
+from commands import CommandRouter, positive_int
+from guilds import GuildState, load_guild_states, save_guild_configs
+from leaderboard import DEFAULT_TOP, parse_day
+from metrics import METRICS
+from outbox import Outbox
+from render import format_duration, join_items, paginate, send_paginated
+from snapshot import SNAPSHOT_INTERVAL_SECONDS
+from stats_api import StatsApi
+from voice_events import JOIN, LEAVE, MOVE, channel_id_of, classify, split_segments
+from weekly import DAY_NAMES, RESULT_EXCLUDED, RESULT_SUCCESS
 
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 CHANNEL_ID = 1346156878111182910
-DATA_FILE = "voice_data.json"
-EXCLUDED_USERS_FILE = "excluded_users.json"
-JOIN_DATA_FILE = "voice_join_data.json"
 GUILD_ID = 1327633759427625012
-
-
-class VoiceTrackerBot(discord.Client):
-    def __init__(self, intents):
-        super().__init__(intents=intents)
+GUILDS_FILE = "guilds.json"
+ALARMS_FILE = "alarms.json"
+MAX_ADD_MINUTES = 24 * 60
+CHANNEL_COUNT_LIMIT = 10
+LAZY_MEMBERS = os.getenv("TIMECHECK_LAZY_MEMBERS") == "1"
+METRICS_ENABLED = os.getenv("TIMECHECK_METRICS", "1") != "0"
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = os.getenv("TIMECHECK_METRICS_PORT")
+STATS_HOST = "127.0.0.1"
+STATS_PORT = os.getenv("TIMECHECK_STATS_PORT")
+DEFAULT_GUILDS = [{"guild_id": GUILD_ID, "channel_id": CHANNEL_ID, "data_dir": "."}]
+
+
+class VoiceTrackerBot(discord.AutoShardedClient):
+    def __init__(self, intents, lazy_members=LAZY_MEMBERS, clock=None):
+        # lazy_members: 시작할 때 멤버 전체를 받지 않고, 음성 채널에 있는 멤버만 캐시한다.
+        # 성공/실패 판정용 멤버 목록은 roster.bin에 ID만 저장해서 쓴다.
+        if lazy_members:
+            super().__init__(
+                intents=intents,
+                chunk_guilds_at_startup=False,
+                member_cache_flags=discord.MemberCacheFlags(voice=True, joined=False),
+            )
+        else:
+            super().__init__(intents=intents)
+        self.lazy_members = lazy_members
 
         self.KST = pytz.timezone("Asia/Seoul")
+        # clock: 현재 시각(KST, aware datetime)을 돌려주는 함수. 리플레이 하네스가 가상 시계를 넣는다.
+        self.clock = clock
+
+        self.alarms = AlarmScheduler(ALARMS_FILE, self.fire_alarm)
+        self.alarms.load()
+        self.alarm_task = None
+        self.board_task = None
+        self.outbox = Outbox(self.get_channel)
+        self.router = self.register_commands()
+
+        self.guild_states = load_guild_states(GUILDS_FILE, DEFAULT_GUILDS)
+        self.weekly_tasks = {}
+
+        METRICS.enabled = METRICS_ENABLED
+        METRICS.gauge("pending_alarms", lambda: len(self.alarms))
+        METRICS.gauge("active_sessions", lambda: sum(len(gs.state.user_join_times) for gs in self.guild_states.values()))
+        METRICS.gauge("outbox_pending_lines", self.outbox.pending)
+        METRICS.gauge("event_loop_lag_last_seconds", lambda: METRICS.loop_lag)
+        self.loop_lag_task = None
+        self.metrics_server = None
+        self.server_task = None
+        self.stats_server = None
+        self.snapshot_task = None
+        self.boot_reports = None
+
+    async def close(self):
+        for gs in self.guild_states.values():
+            await gs.state.flush()
+        await self.outbox.flush()
+        await super().close()
+
+    def start_weekly_task(self, gs: GuildState):
+        task = self.weekly_tasks.get(gs.guild_id)
+        if task is None or task.done():
+            self.weekly_tasks[gs.guild_id] = self.loop.create_task(self.send_weekly_summary(gs))
+
+    def now(self):
+        if self.clock is not None:
+            return self.clock()
+        return datetime.now(self.KST)
 
-        self.user_join_times = {}
-        self.user_total_time = {str(i): {} for i in range(7)}
-        self.user_daily_time = {str(i): {} for i in range(7)}
-        self.alarms = {}
-        self.excluded_users = set()
+    def is_admin(self, member: discord.Member) -> bool:
+        perms = member.guild_permissions
+        return perms.administrator or perms.manage_guild
 
-        self.load_data()
-        self.load_excluded_users()
-        self.load_user_join_times_file()
+    def register_report_channel(self, guild: discord.Guild, channel):
+        gs = self.guild_states.get(guild.id)
+        if gs is None:
+            gs = GuildState(guild.id, channel.id)
+            self.load_guild_members(gs, guild)
+            # 이미 음성 채널에 있는 사람은 부팅 때와 같은 방식으로 지금부터 세션을 연다
+            self.recover_join_times_on_boot(gs)
+            self.guild_states[guild.id] = gs
+            self.start_weekly_task(gs)
+        else:
+            gs.channel_id = channel.id
+        save_guild_configs(GUILDS_FILE, self.guild_states)
+        return gs
 
-    def load_data(self):
-        try:
-            with open(DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.user_total_time = data.get("user_total_time", {str(i): {} for i in range(7)})
-                self.user_daily_time = data.get("user_daily_time", {str(i): {} for i in range(7)})
-        except FileNotFoundError:
-            self.save_data()
-        except Exception as e:
-            print(f"[ERROR] 데이터 로드 실패: {e}")
+    def find_member_by_name(self, guild: discord.Guild, name: str):
+        gs = self.guild_states.get(guild.id)
+        if gs is None:
+            return None, "대상 없음"
+        return gs.member_index.find(name)
+
+    async def lookup_member(self, guild: discord.Guild, name: str):
+        gs = self.guild_states.get(guild.id)
+        if gs is None:
+            return None, "대상 없음"
+        if self.lazy_members:
+            return await gs.members.search(guild, name)
+        return gs.member_index.find(name)
+
+    def load_guild_members(self, gs: GuildState, guild: discord.Guild):
+        gs.afk_channel_id = guild.afk_channel.id if guild.afk_channel else None
+        if self.lazy_members:
+            if not gs.state.weekly.roster:
+                self.loop.create_task(self.refresh_roster(gs, guild))
+            return
+        gs.member_index.build(guild.members)
+        gs.state.set_roster(member.id for member in guild.members if not member.bot)
 
-    def save_data(self):
-        data = {
-            "user_total_time": self.user_total_time,
-            "user_daily_time": self.user_daily_time,
-        }
+    async def refresh_roster(self, gs: GuildState, guild: discord.Guild):
+        # 멤버 객체는 쌓아 두지 않고 ID만 모은다
+        member_ids = []
         try:
-            with open(DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+            async for member in guild.fetch_members(limit=None):
+                if not member.bot:
+                    member_ids.append(member.id)
         except Exception as e:
-            print(f"[ERROR] 데이터 저장 실패: {e}")
+            print(f"[ERROR] 멤버 목록 갱신 실패: {e}")
+            return None
+        gs.state.set_roster(member_ids)
+        return len(member_ids)
+
+    def recover_join_times_on_boot(self, gs: GuildState):
+        # 저장된 세션과 실제 음성 채널 상태를 한 번에 맞춘다. 나간 사람은 모아서 한꺼번에 적립하고,
+        # 꺼져 있는 동안 들어온 사람은 지금부터 세션을 연다. 보고할 줄 목록을 돌려준다.
+        guild = self.get_guild(gs.guild_id)
+        if not guild:
+            print("[ERROR] 서버 정보를 불러오지 못했습니다.")
+            return []
 
-    def load_excluded_users(self):
-        try:
-            with open(EXCLUDED_USERS_FILE, "r", encoding="utf-8") as f:
-                self.excluded_users = set(json.load(f))
-        except FileNotFoundError:
-            self.excluded_users = set()
-        except Exception as e:
-            print(f"[ERROR] 제외 유저 로드 실패: {e}")
-            self.excluded_users = set()
+        now = self.now()
+        gs.presence.sync(guild.voice_channels)
 
-    def save_excluded_users(self):
-        try:
-            with open(EXCLUDED_USERS_FILE, "w", encoding="utf-8") as f:
-                json.dump(list(self.excluded_users), f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"[ERROR] 제외 유저 저장 실패: {e}")
-
-    def load_user_join_times_file(self):
-        try:
-            with open(JOIN_DATA_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            recovered = {}
-            for user_id_str, time_str in data.items():
-                try:
-                    recovered[int(user_id_str)] = datetime.fromisoformat(time_str)
-                except Exception:
-                    continue
-            self.user_join_times = recovered
-        except FileNotFoundError:
-            self.user_join_times = {}
-        except Exception as e:
-            print(f"[ERROR] 유저 입장 시간 파일 로드 실패: {e}")
-            self.user_join_times = {}
+        sessions = []
+        for user_id, join_time in list(gs.state.user_join_times.items()):
+            channel_id = gs.presence.channel_of(user_id)
+            if gs.is_counted(channel_id):
+                gs.state.move_session(user_id, channel_id, now)
+                continue
 
-    def save_user_join_times(self):
+            gs.state.end_session(user_id)
+            if now - join_time >= timedelta(minutes=20):
+                sessions.append((user_id, join_time, now))
+
+        opened = [
+            user_id
+            for user_id in gs.presence.users() - gs.state.user_join_times.keys()
+            if gs.is_counted(gs.presence.channel_of(user_id))
+        ]
+        for user_id in opened:
+            gs.state.start_session(user_id, now, gs.presence.channel_of(user_id))
+
+        lines = []
+        for user_id, day_seconds in bucket_sessions(sessions).items():
+            gs.state.credit_days(user_id, day_seconds)
+            minutes = sum(day_seconds) // 60
+            lines.append(f"🔁 <@{user_id}>님은 재부팅 중에도 {minutes}분 동안 공부하셨습니다!")
+        if opened:
+            lines.extend(join_items("▶️ 재부팅 중에 입장해 지금부터 기록합니다: ", [f"<@{user_id}>" for user_id in opened]))
+        return lines
+
+    async def send_boot_report(self, gs: GuildState, lines):
+        channel = self.get_channel(gs.channel_id)
+        if channel is None:
+            return
         try:
-            save_dict = {str(user_id): time.isoformat() for user_id, time in self.user_join_times.items()}
-            with open(JOIN_DATA_FILE, "w", encoding="utf-8") as f:
-                json.dump(save_dict, f, indent=4, ensure_ascii=False)
+            await send_paginated(channel, ["✅ 디스코드 봇이 켜졌습니다!"] + lines)
         except Exception as e:
-            print(f"[ERROR] 유저 입장 시간 저장 실패: {e}")
-
-    def is_admin(self, member: discord.Member) -> bool:
-        perms = member.guild_permissions
-        return perms.administrator or perms.manage_guild
+            print(f"[ERROR] 부팅 보고 전송 실패: {e}")
 
-    def reset_all_records(self):
-        self.user_total_time = {str(i): {} for i in range(7)}
-        self.user_daily_time = {str(i): {} for i in range(7)}
-        self.excluded_users.clear()
-        self.save_data()
-        self.save_excluded_users()
+    async def flush_active_voice_sessions_until(self, gs: GuildState, cutoff: datetime):
+        sessions = []
 
-    def reset_user_records(self, user_id: int):
-        uid = str(user_id)
-        for i in range(7):
-            day = str(i)
-            if uid in self.user_total_time.get(day, {}):
-                del self.user_total_time[day][uid]
-            if uid in self.user_daily_time.get(day, {}):
-                del self.user_daily_time[day][uid]
-        if uid in self.excluded_users:
-            self.excluded_users.discard(uid)
-            self.save_excluded_users()
-        self.save_data()
-
-    def find_member_by_name(self, guild: discord.Guild, name: str):
-        key = name.strip().lower()
-        if not key:
-            return None, "이름이 비어있음"
-
-        exact = []
-        partial = []
-
-        for m in guild.members:
-            if m.bot:
+        for user_id, join_time in list(gs.state.user_join_times.items()):
+            channel_id = gs.presence.channel_of(user_id)
+            if not gs.is_counted(channel_id):
                 continue
-            dn = (m.display_name or "").lower()
-            un = (m.name or "").lower()
 
-            if key == dn or key == un:
-                exact.append(m)
-            elif key in dn or key in un:
-                partial.append(m)
+            if join_time < cutoff and cutoff - join_time >= timedelta(minutes=20):
+                sessions.append((user_id, join_time, cutoff))
 
-        if len(exact) == 1:
-            return exact[0], None
-        if len(exact) > 1:
-            return None, "동일한 이름이 여러명"
+            gs.state.start_session(user_id, cutoff, channel_id)
 
-        if len(partial) == 1:
-            return partial[0], None
-        if len(partial) > 1:
-            return None, "비슷한 이름이 여러명"
+        for user_id, day_seconds in bucket_sessions(sessions).items():
+            gs.state.credit_days(user_id, day_seconds)
 
-        return None, "대상 없음"
+    async def on_ready(self):
+        print(f"Logged in as {self.user}")
 
-    async def recover_join_times_on_boot(self):
-        guild = self.get_guild(GUILD_ID)
-        if not guild:
-            print("[ERROR] 서버 정보를 불러오지 못했습니다.")
-            return
+        if self.alarm_task is None or self.alarm_task.done():
+            self.alarm_task = self.loop.create_task(self.alarms.run())
 
-        channel = self.get_channel(CHANNEL_ID)
-        now = datetime.now(self.KST)
+        if self.board_task is None or self.board_task.done():
+            self.board_task = self.loop.create_task(self.run_progress_boards())
 
-        voice_connected_users = {
-            member.id
-            for vc in guild.voice_channels
-            for member in vc.members
-        }
+        if self.loop_lag_task is None and METRICS.enabled:
+            self.loop_lag_task = self.loop.create_task(METRICS.watch_loop_lag())
 
-        recovered = {}
+        # 복구는 await 없이 모든 서버를 먼저 끝내서 이후 이벤트가 복구된 상태 위에서 처리되게 하고,
+        # 보고 메시지는 서버별로 동시에 백그라운드에서 보낸다.
+        reports = []
+        for gs in list(self.guild_states.values()):
+            guild = self.get_guild(gs.guild_id)
+            if guild:
+                self.load_guild_members(gs, guild)
 
-        for user_id, join_time in list(self.user_join_times.items()):
-            if user_id in voice_connected_users:
-                recovered[user_id] = join_time
-                continue
+            reports.append(self.send_boot_report(gs, self.recover_join_times_on_boot(gs)))
+            self.start_weekly_task(gs)
 
-            duration = now - join_time
-            if duration >= timedelta(minutes=20):
-                seconds = int(duration.total_seconds())
-                weekday = str(join_time.weekday())
-                uid = str(user_id)
+        self.boot_reports = asyncio.gather(*reports)
 
-                self.user_total_time[weekday].setdefault(uid, 0)
-                self.user_daily_time[weekday].setdefault(uid, 0)
-                self.user_total_time[weekday][uid] += seconds
-                self.user_daily_time[weekday][uid] += seconds
+        if self.server_task is None or self.server_task.done():
+            self.server_task = self.loop.create_task(self.start_servers())
 
-                if channel:
-                    minutes = seconds // 60
-                    await channel.send(f"🔁 <@{user_id}>님은 재부팅 중에도 {minutes}분 동안 공부하셨습니다!")
-            else:
-                pass
+    async def start_servers(self):
+        # 포트를 열지 못해도 봇은 그대로 돈다. 실패한 서버는 다음 on_ready에서 다시 시도한다
+        if METRICS.enabled and METRICS_PORT and self.metrics_server is None:
+            try:
+                self.metrics_server = await METRICS.serve(METRICS_HOST, int(METRICS_PORT))
+            except Exception as e:
+                print(f"[ERROR] 메트릭 서버 시작 실패: {e}")
 
-        self.user_join_times = recovered
-        self.save_user_join_times()
-        self.save_data()
+        if STATS_PORT and self.stats_server is None:
+            try:
+                self.stats_server = await StatsApi(self.guild_states).serve(STATS_HOST, int(STATS_PORT))
+            except Exception as e:
+                print(f"[ERROR] 통계 API 서버 시작 실패: {e}")
+                return
+            # 스냅샷 발행은 API가 열린 뒤에만 돌린다
+            self.snapshot_task = self.loop.create_task(self.run_snapshot_publisher())
 
-    async def flush_active_voice_sessions_until(self, cutoff: datetime):
-        guild = self.get_guild(GUILD_ID)
-        if not guild:
+    async def on_guild_update(self, before, after):
+        gs = self.guild_states.get(after.id)
+        if gs is None:
+            return
+        old = gs.afk_channel_id
+        gs.afk_channel_id = after.afk_channel.id if after.afk_channel else None
+        if old == gs.afk_channel_id:
             return
 
-        voice_connected_users = {
-            member.id
-            for vc in guild.voice_channels
-            for member in vc.members
-        }
-
-        for user_id, join_time in list(self.user_join_times.items()):
-            if user_id not in voice_connected_users:
-                continue
-
-            if join_time >= cutoff:
-                self.user_join_times[user_id] = cutoff
-                continue
+        now = self.now()
+        for channel_id in (old, gs.afk_channel_id):
+            if channel_id is not None:
+                await self.reconcile_channel(gs, after, channel_id, now)
+
+    async def on_member_join(self, member):
+        gs = self.guild_states.get(member.guild.id)
+        if gs and not member.bot:
+            if not self.lazy_members:
+                gs.member_index.add(member)
+            gs.state.add_member(member.id)
+
+    async def on_member_remove(self, member):
+        gs = self.guild_states.get(member.guild.id)
+        if gs:
+            gs.member_index.remove(member.id)
+
+    async def on_raw_member_remove(self, payload):
+        # 캐시에 없는 멤버(lazy 모드에서 음성 채널 밖에 있던 사람)는 on_member_remove가 오지 않는다
+        gs = self.guild_states.get(payload.guild_id)
+        if gs:
+            gs.members.discard(payload.user.id)
+            gs.state.remove_member(payload.user.id)
+
+    async def on_member_update(self, before, after):
+        gs = self.guild_states.get(after.guild.id)
+        if gs and before.display_name != after.display_name:
+            if self.lazy_members:
+                gs.members.discard(after.id)
+            else:
+                gs.member_index.update(after)
 
-            total_seconds = int((cutoff - join_time).total_seconds())
-            if total_seconds < 20 * 60:
-                self.user_join_times[user_id] = cutoff
+    async def on_user_update(self, before, after):
+        if before.name == after.name and before.display_name == after.display_name:
+            return
+        for gs in self.guild_states.values():
+            gs.members.discard(after.id)
+            if after.id not in gs.member_index:
                 continue
+            guild = self.get_guild(gs.guild_id)
+            member = guild.get_member(after.id) if guild else None
+            if member:
+                gs.member_index.update(member)
+
+    def register_commands(self):
+        router = CommandRouter(self.guild_state_for_message)
+        router.register_numeric(self.cmd_set_alarm, needs_state=False, cooldown=2)
+        router.register("알람삭제", self.cmd_cancel_alarm, takes_args=True, needs_state=False, cooldown=2)
+        router.register("채널설정", self.cmd_register_channel, needs_state=False, cooldown=10)
+        router.register("중간정산", self.cmd_intermediate_summary, cooldown=10)
+        router.register("진행도", self.cmd_progress_status, cooldown=5)
+        router.register("진행판", self.cmd_board_on, cooldown=10)
+        router.register("진행판끄기", self.cmd_board_off, cooldown=10)
+        router.register("기록", self.cmd_user_history, cooldown=10)
+        router.register("랭킹", self.cmd_ranking, takes_args=True, cooldown=5)
+        router.register("내순위", self.cmd_my_rank, cooldown=5)
+        router.register("현재상황", self.cmd_current_summary, cooldown=30, max_concurrency=1)
+        router.register("제외", self.cmd_exclude, cooldown=5)
+        router.register("음성제외", self.cmd_exclude_channel, takes_args=True, cooldown=5)
+        router.register("음성제외취소", self.cmd_include_channel, takes_args=True, cooldown=5)
+        router.register("제외취소", self.cmd_include, cooldown=5)
+        router.register("초기화", self.cmd_reset, takes_args=True, cooldown=3)
+        router.register("시간추가", self.cmd_add_time, parse=positive_int, cooldown=5)
+        router.register("상태", self.cmd_metrics, needs_state=False, cooldown=5)
+        router.register("명단갱신", self.cmd_refresh_roster, cooldown=60, max_concurrency=1)
+        return router
+
+    def guild_state_for_message(self, message):
+        if message.guild is None:
+            return None
+        return self.guild_states.get(message.guild.id)
 
-            current = join_time
-            while current < cutoff:
-                next_midnight = current.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                segment_end = cutoff if cutoff < next_midnight else next_midnight
-
-                seg_seconds = int((segment_end - current).total_seconds())
-                if seg_seconds > 0:
-                    day_key = str(current.weekday())
-                    uid = str(user_id)
+    async def on_message(self, message):
+        if message.author.bot:
+            return
 
-                    self.user_total_time[day_key].setdefault(uid, 0)
-                    self.user_daily_time[day_key].setdefault(uid, 0)
-                    self.user_total_time[day_key][uid] += seg_seconds
-                    self.user_daily_time[day_key][uid] += seg_seconds
+        await self.router.dispatch(message)
 
-                current = segment_end
+    async def cmd_set_alarm(self, message, gs, minutes):
+        await self.set_alarm(message, minutes)
 
-            self.user_join_times[user_id] = cutoff
+    async def cmd_cancel_alarm(self, message, gs, args):
+        if not args:
+            await self.cancel_alarm(message)
+            return
+        alarm_id = positive_int(args.lstrip("#"))
+        if alarm_id is None:
+            await message.channel.send("⚠️ 사용법: `!알람삭제` (전부) 또는 `!알람삭제 <번호>`")
+            return
+        await self.cancel_alarm(message, alarm_id)
 
-        self.save_user_join_times()
-        self.save_data()
+    async def cmd_register_channel(self, message, gs, args):
+        if message.guild is None:
+            return
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
+            return
+        self.register_report_channel(message.guild, message.channel)
+        await message.channel.send(f"✅ {message.channel.mention} 채널을 이 서버의 보고 채널로 설정했습니다.")
 
-    async def on_ready(self):
-        print(f"Logged in as {self.user}")
+    async def cmd_metrics(self, message, gs, args):
+        if message.guild is None or not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
+            return
+        if not METRICS.enabled:
+            await message.channel.send("⚠️ 메트릭 수집이 꺼져 있습니다. (`TIMECHECK_METRICS=0`)")
+            return
+        await send_paginated(message.channel, ["**🩺 봇 상태**"] + METRICS.summary_lines())
 
-        channel = self.get_channel(CHANNEL_ID)
-        if channel:
-            await channel.send("✅ 디스코드 봇이 켜졌습니다!")
+    async def cmd_refresh_roster(self, message, gs, args):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
+            return
+        count = await self.refresh_roster(gs, message.guild)
+        if count is None:
+            await message.channel.send("⚠️ 멤버 목록을 갱신하지 못했습니다.")
+            return
+        await message.channel.send(f"✅ 멤버 목록을 갱신했습니다. ({count}명)")
 
-        await self.recover_join_times_on_boot()
-        self.loop.create_task(self.send_weekly_summary())
+    async def cmd_intermediate_summary(self, message, gs, args):
+        await self.send_intermediate_summary(gs, message.channel)
 
-    async def on_message(self, message):
-        if message.author.bot:
+    async def cmd_progress_status(self, message, gs, args):
+        if gs.board is not None:
+            # 진행판은 고정돼 있으므로 링크 안내는 채널마다 가끔만 보낸다
+            if gs.board.link_due(message.channel.id, self.now().timestamp()):
+                await message.channel.send(f"📌 실시간 진행판: {gs.board.jump_url(gs.guild_id)}")
             return
+        await self.send_progress_status(gs, message.channel)
 
-        if message.content == "!중간정산":
-            await self.send_intermediate_summary(message.channel)
+    async def cmd_board_on(self, message, gs, args):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
             return
-
-        if message.content == "!진행도":
-            await self.send_progress_status(message.channel)
+        channel = self.get_channel(gs.channel_id)
+        if channel is None:
+            await message.channel.send("⚠️ 보고 채널을 찾을 수 없습니다. 먼저 `!채널설정`을 해주세요.")
             return
+        if gs.board is not None:
+            await self.remove_board(gs)
 
-        if message.content == "!현재상황":
-            await self.send_weekly_summary_Test(message.channel)
+        content = next(paginate(self.progress_lines(gs, self.board_now(), BOARD_MAX_ROWS)))
+        board_message = await channel.send(content)
+        try:
+            await board_message.pin()
+        except Exception as e:
+            print(f"[ERROR] 진행판 고정 실패: {e}")
+        gs.board = ProgressBoard(channel.id, board_message.id)
+        gs.board.mark_sent(content)
+        save_guild_configs(GUILDS_FILE, self.guild_states)
+        await message.channel.send(f"✅ {channel.mention}에 실시간 진행판을 만들었습니다. ({BOARD_INTERVAL_SECONDS}초마다 갱신)")
+
+    async def cmd_board_off(self, message, gs, args):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
             return
-
-        if message.content == "!제외":
-            today = datetime.now(self.KST).weekday()
-            if today in [0, 1, 2]:
-                self.excluded_users.add(str(message.author.id))
-                self.save_excluded_users()
-                await message.channel.send(f"🚫 {message.author.mention}, 주간 요약에서 제외되었습니다.")
-            else:
-                await message.channel.send(f"⚠️ {message.author.mention}, 월, 화, 수요일에만 제외할 수 있습니다.")
+        if gs.board is None:
+            await message.channel.send("⚠️ 켜져 있는 진행판이 없습니다.")
             return
+        await self.remove_board(gs)
+        save_guild_configs(GUILDS_FILE, self.guild_states)
+        await message.channel.send("✅ 실시간 진행판을 껐습니다.")
+
+    async def cmd_user_history(self, message, gs, args):
+        await self.send_user_history(gs, message.channel, message.author)
+
+    async def cmd_ranking(self, message, gs, args):
+        day = None
+        if args:
+            day = parse_day(args)
+            if day is None:
+                await message.channel.send("⚠️ 사용법: `!랭킹` 또는 `!랭킹 월` (월~일)")
+                return
+        await self.send_ranking(gs, message.channel, day)
 
-        if message.content == "!제외취소":
-            self.excluded_users.discard(str(message.author.id))
-            self.save_excluded_users()
-            await message.channel.send(f"✅ {message.author.mention}, 주간 요약에 다시 포함됩니다.")
+    async def cmd_my_rank(self, message, gs, args):
+        rank, total = gs.state.leaderboard.rank(message.author.id)
+        if rank is None:
+            await message.channel.send(f"📭 {message.author.mention}, 이번 주 기록이 없습니다.")
             return
+        await message.channel.send(
+            f"🏅 {message.author.mention}, 이번 주 {len(gs.state.leaderboard)}명 중 {rank}위입니다! ({format_duration(total)})"
+        )
 
-        if message.content.startswith("!초기화"):
-            guild = self.get_guild(GUILD_ID)
-            if not guild:
-                await message.channel.send("⚠️ 서버 정보를 가져올 수 없습니다.")
-                return
+    async def cmd_current_summary(self, message, gs, args):
+        await self.send_weekly_summary_Test(gs, message.channel)
 
-            if not self.is_admin(message.author):
-                await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
-                return
+    async def cmd_exclude(self, message, gs, args):
+        today = self.now().weekday()
+        if today in [0, 1, 2]:
+            gs.state.exclude(message.author.id)
+            await message.channel.send(f"🚫 {message.author.mention}, 주간 요약에서 제외되었습니다.")
+        else:
+            await message.channel.send(f"⚠️ {message.author.mention}, 월, 화, 수요일에만 제외할 수 있습니다.")
+
+    def target_voice_channel(self, message):
+        for channel in message.channel_mentions:
+            if isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+                return channel
+        voice = getattr(message.author, "voice", None)
+        return voice.channel if voice else None
+
+    async def cmd_exclude_channel(self, message, gs, args):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
+            return
+        channel = self.target_voice_channel(message)
+        if channel is None:
+            await message.channel.send("⚠️ 음성 채널을 멘션하거나 음성 채널에 들어간 상태에서 사용해주세요.")
+            return
 
-            parts = message.content.split(maxsplit=1)
+        gs.excluded_channels.add(channel.id)
+        await self.reconcile_channel(gs, message.guild, channel.id, self.now())
+        save_guild_configs(GUILDS_FILE, self.guild_states)
+        await message.channel.send(f"🚫 {channel.mention} 채널의 시간은 이제 공부 시간으로 세지 않습니다.")
 
-            if len(parts) == 1:
-                self.reset_all_records()
-                await message.channel.send("✅ 모든 기록을 초기화했습니다.")
-                return
+    async def cmd_include_channel(self, message, gs, args):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
+            return
+        channel = self.target_voice_channel(message)
+        if channel is None or channel.id not in gs.excluded_channels:
+            await message.channel.send("⚠️ 제외된 음성 채널이 아닙니다.")
+            return
 
-            target = parts[1].strip()
+        gs.excluded_channels.discard(channel.id)
+        await self.reconcile_channel(gs, message.guild, channel.id, self.now())
+        save_guild_configs(GUILDS_FILE, self.guild_states)
+        await message.channel.send(f"✅ {channel.mention} 채널의 시간을 다시 공부 시간으로 셉니다.")
+
+    async def reconcile_channel(self, gs: GuildState, guild: discord.Guild, channel_id: int, now):
+        # 채널을 세는지 여부가 바뀐 뒤 그 채널에 있는 사람들의 세션을 맞춘다.
+        # 세는 채널이 됐으면 지금부터 세션을 열고, 아니면 지금 나간 것으로 처리한다
+        if gs.is_counted(channel_id):
+            for user_id in list(gs.presence.users_in(channel_id)):
+                if user_id not in gs.state.user_join_times:
+                    gs.state.start_session(user_id, now, channel_id)
+            return
 
-            if message.mentions:
-                m = message.mentions[0]
-                self.reset_user_records(m.id)
-                await message.channel.send(f"✅ {m.mention} 기록을 초기화했습니다.")
-                return
+        user_ids = [user_id for user_id in gs.presence.users_in(channel_id) if user_id in gs.state.user_join_times]
+        members = await gs.members.resolve(guild, user_ids)
+        if gs.is_counted(channel_id):
+            return
+        for user_id in user_ids:
+            member = members.get(user_id)
+            self.finish_session(gs, user_id, member.display_name if member else user_id, now)
 
-            member, err = self.find_member_by_name(guild, target)
-            if member is None:
-                await message.channel.send(f"⚠️ 대상 찾기 실패: {err}")
-                return
+    async def cmd_include(self, message, gs, args):
+        gs.state.include(message.author.id)
+        await message.channel.send(f"✅ {message.author.mention}, 주간 요약에 다시 포함됩니다.")
 
-            self.reset_user_records(member.id)
-            await message.channel.send(f"✅ {member.mention} 기록을 초기화했습니다.")
+    async def cmd_reset(self, message, gs, target):
+        if not self.is_admin(message.author):
+            await message.channel.send("⚠️ 이 명령은 관리자만 사용할 수 있습니다.")
             return
 
-        if re.match(r"^!\d+$", message.content):
-            minutes = int(message.content[1:])
-            await self.set_alarm(message, minutes)
+        if not target:
+            gs.state.reset_all()
+            await message.channel.send("✅ 모든 기록을 초기화했습니다.")
             return
 
-        if message.content == "!알람삭제":
-            await self.cancel_alarm(message)
+        if message.mentions:
+            m = message.mentions[0]
+            gs.state.reset_user(m.id)
+            await message.channel.send(f"✅ {m.mention} 기록을 초기화했습니다.")
             return
 
-        if message.content.startswith("!시간추가"):
-            parts = message.content.split()
-            if len(parts) != 2:
-                return
-            try:
-                add_minutes = int(parts[1])
-                if add_minutes <= 0:
-                    return
-            except ValueError:
-                return
-
-            now = datetime.now(self.KST)
-            weekday = str(now.weekday())
-            user_id = str(message.author.id)
+        member, err = await self.lookup_member(message.guild, target)
+        if member is None:
+            await message.channel.send(f"⚠️ 대상 찾기 실패: {err}")
+            return
 
-            self.user_total_time[weekday].setdefault(user_id, 0)
-            self.user_daily_time[weekday].setdefault(user_id, 0)
-            self.user_total_time[weekday][user_id] += add_minutes * 60
-            self.user_daily_time[weekday][user_id] += add_minutes * 60
-            self.save_data()
+        gs.state.reset_user(member.id)
+        await message.channel.send(f"✅ {member.mention} 기록을 초기화했습니다.")
 
-            channel = self.get_channel(CHANNEL_ID)
-            if channel:
-                await channel.send(
-                    f"⏫ <@{user_id}> ({message.author.display_name})님이 {add_minutes}분을 수동 추가했습니다! ({now.strftime('%Y-%m-%d')})"
-                )
+    async def cmd_add_time(self, message, gs, add_minutes):
+        # 하루치를 넘는 값은 받지 않는다. 기록 배열(int64)과 보관 파일(uint32) 범위를 넘지 않게 하는 것도 겸한다
+        if add_minutes > MAX_ADD_MINUTES:
+            await message.channel.send(f"⚠️ {message.author.mention}, 한 번에 최대 {MAX_ADD_MINUTES}분까지 추가할 수 있습니다.")
             return
 
-    async def on_voice_state_update(self, member, before, after):
-        now = datetime.now(self.KST)
-        channel = self.get_channel(CHANNEL_ID)
+        now = self.now()
+        user_id = message.author.id
 
-        if before.channel is None and after.channel is not None:
-            self.user_join_times[member.id] = now
-            self.save_user_join_times()
-            return
+        gs.state.credit(user_id, now.weekday(), add_minutes * 60, manual=True)
 
-        if before.channel is not None and after.channel is None:
-            if member.id not in self.user_join_times:
-                return
+        self.outbox.notify(
+            gs.channel_id,
+            f"⏫ <@{user_id}> ({message.author.display_name})님이 {add_minutes}분을 수동 추가했습니다! ({now.strftime('%Y-%m-%d')})",
+        )
 
-            join_time = self.user_join_times.pop(member.id)
-            self.save_user_join_times()
+    async def on_voice_state_update(self, member, before, after):
+        # 음소거/헤드셋/방송/카메라 변경처럼 채널이 그대로인 이벤트는 시각도 읽지 않고 바로 버린다
+        before_id = channel_id_of(before)
+        after_id = channel_id_of(after)
+        if before_id == after_id or member.bot:
+            return
 
-            duration = now - join_time
-            if duration < timedelta(minutes=20):
-                return
+        with METRICS.time("handler_latency_seconds", handler="on_voice_state_update"):
+            await self.handle_voice_state_update(member, before_id, after_id)
 
-            total_seconds = int(duration.total_seconds())
+    async def handle_voice_state_update(self, member, before_id, after_id):
+        gs = self.guild_states.get(member.guild.id)
+        if gs is None:
+            return
 
-            current = join_time
-            cutoff = now
-            while current < cutoff:
-                next_midnight = current.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-                segment_end = cutoff if cutoff < next_midnight else next_midnight
+        gs.presence.move(member.id, after_id)
+        kind = classify(before_id, after_id, gs.is_counted)
 
-                seg_seconds = int((segment_end - current).total_seconds())
-                if seg_seconds > 0:
-                    day_key = str(current.weekday())
-                    uid = str(member.id)
+        if kind == MOVE:
+            # 세지 않는 채널이 나중에 세는 채널로 바뀐 경우 등 세션이 없을 수 있다
+            if member.id in gs.state.user_join_times:
+                gs.state.move_session(member.id, after_id, self.now())
+            else:
+                gs.state.start_session(member.id, self.now(), after_id)
+            return
 
-                    self.user_total_time[day_key].setdefault(uid, 0)
-                    self.user_daily_time[day_key].setdefault(uid, 0)
-                    self.user_total_time[day_key][uid] += seg_seconds
-                    self.user_daily_time[day_key][uid] += seg_seconds
+        if kind == JOIN:
+            gs.state.start_session(member.id, self.now(), after_id)
+            return
 
-                current = segment_end
+        if kind == LEAVE:
+            self.finish_session(gs, member.id, member.display_name, self.now())
 
-            self.save_data()
+    def finish_session(self, gs: GuildState, user_id: int, name, now):
+        segments = gs.state.segments.get(user_id)
+        join_time = gs.state.end_session(user_id)
+        if join_time is None:
+            return
 
-            if channel:
-                await channel.send(f"🔴 {join_time.strftime('%H:%M:%S')} ~ {now.strftime('%H:%M:%S')} ({member.display_name})")
+        duration = now - join_time
+        if duration < timedelta(minutes=20):
             return
 
-    async def send_intermediate_summary(self, channel):
-        summary = "**📊 현재까지의 스터디 이용 시간**\n"
-        days = ["월", "화", "수", "목", "금", "토", "일"]
+        gs.state.credit_days(user_id, split_session(join_time, now))
 
-        for i, users in self.user_total_time.items():
-            summary += f"🗓 {days[int(i)]}요일:\n"
+        line = f"🔴 {join_time.strftime('%H:%M:%S')} ~ {now.strftime('%H:%M:%S')} ({name})"
+        if segments and len(segments) > 1:
+            line += " · " + ", ".join(
+                f"<#{channel_id}> {seconds // 60}분"
+                for channel_id, seconds in split_segments(segments, now)
+                if channel_id is not None
+            )
+        self.outbox.notify(gs.channel_id, line)
+
+    async def send_intermediate_summary(self, gs: GuildState, channel):
+        lines = ["**📊 현재까지의 스터디 이용 시간**"]
+
+        for i in range(7):
+            users = list(gs.state.ledger.day_items(i))
+            lines.append(f"🗓 {DAY_NAMES[i]}요일:")
             if not users:
-                summary += "  └ 기록 없음\n"
+                lines.append("  └ 기록 없음")
             else:
-                for user_id, duration in users.items():
-                    hours, remainder = divmod(duration, 3600)
-                    minutes, _ = divmod(remainder, 60)
-                    summary += f"  └ <@{user_id}>: {hours}시간 {minutes}분\n"
-
-        await channel.send(summary)
+                lines.extend(f"  └ <@{user_id}>: {format_duration(duration)}" for user_id, duration in users)
+
+        await send_paginated(channel, lines)
+
+    async def send_ranking(self, gs: GuildState, channel, day=None, k=DEFAULT_TOP):
+        top = gs.state.leaderboard.top(k, day)
+        title = "이번 주 누적" if day is None else f"{DAY_NAMES[day]}요일"
+        lines = [f"**🏆 {title} 랭킹 TOP {k}**"]
+        if not top:
+            lines.append("  └ 기록 없음")
+        for i, (user_id, seconds) in enumerate(top, 1):
+            lines.append(f"{i}. <@{user_id}>: {format_duration(seconds)}")
+        await send_paginated(channel, lines)
+
+    async def send_user_history(self, gs: GuildState, channel, member, weeks=12):
+        history = gs.archive.user_history(member.id, limit=weeks)
+        if not history:
+            await channel.send(f"📭 {member.mention}, 보관된 주간 기록이 없습니다.")
+            return
 
-    async def send_progress_status(self, channel):
-        now = datetime.now(self.KST)
-        if not self.user_join_times:
-            await channel.send("현재 음성 채널에 있는 사람이 없습니다.")
+        lines = [f"**📚 {member.display_name}님의 최근 {len(history)}주 기록**"]
+        for record in reversed(history):
+            total = sum(record.day_seconds)
+            if record.result == RESULT_EXCLUDED:
+                mark = "🚫"
+            elif record.result == RESULT_SUCCESS:
+                mark = "✅"
+            else:
+                mark = "❌"
+            days = " ".join(
+                f"{DAY_NAMES[i]}{seconds // 3600}:{seconds % 3600 // 60:02d}"
+                for i, seconds in enumerate(record.day_seconds)
+                if seconds
+            )
+            line = f"{mark} {record.week_start.strftime('%Y-%m-%d')} 주: {format_duration(total)}"
+            lines.append(f"{line} ({days})" if days else line)
+
+        await send_paginated(channel, lines)
+
+    def archive_week(self, gs: GuildState, week_start):
+        # 주에 한 번이라 이벤트 루프에서 바로 쓴다. 적립과 초기화 사이에 await가 끼지 않게 하려는 것
+        return gs.archive.append_week(week_start, gs.state.weekly.rows())
+
+    async def send_progress_status(self, gs: GuildState, channel):
+        await send_paginated(channel, self.progress_lines(gs, self.now()))
+
+    def progress_lines(self, gs: GuildState, now, max_rows=None):
+        if not gs.state.user_join_times:
+            return ["현재 음성 채널에 있는 사람이 없습니다."]
+
+        lines = ["**🔄 현재 진행도 현황**"]
+        channel_ids = {gs.presence.channel_of(user_id) for user_id in gs.state.user_join_times} - {None}
+        if channel_ids:
+            counts = sorted(((gs.presence.count(channel_id), channel_id) for channel_id in channel_ids), reverse=True)
+            items = [f"<#{channel_id}> {count}명" for count, channel_id in counts[:CHANNEL_COUNT_LIMIT]]
+            if len(counts) > CHANNEL_COUNT_LIMIT:
+                items.append(f"외 {len(counts) - CHANNEL_COUNT_LIMIT}개 채널")
+            lines.extend(join_items("🎧 채널별 인원: ", items))
+
+        for i, (user_id, join_time) in enumerate(gs.state.user_join_times.items()):
+            if max_rows is not None and i == max_rows:
+                lines.append(f"… 외 {len(gs.state.user_join_times) - max_rows}명")
+                break
+            duration = max(0, int((now - join_time).total_seconds()))
+            channel_id = gs.presence.channel_of(user_id)
+            where = f" (<#{channel_id}>)" if channel_id is not None else ""
+            lines.append(f"🔹 <@{user_id}>: {format_duration(duration)}째 진행 중{where}")
+        return lines
+
+    def board_now(self):
+        # 진행판은 분 단위로만 바뀌도록 초를 버린 시각으로 그린다
+        return self.now().replace(second=0, microsecond=0)
+
+    async def run_progress_boards(self):
+        # 진행판이 켜진 모든 서버를 작업 하나가 주기적으로 돌며, 바뀐 것이 있을 때만 메시지를 수정한다
+        while not self.is_closed():
+            now = self.board_now()
+            for gs in list(self.guild_states.values()):
+                if gs.board is not None:
+                    await self.update_board(gs, now)
+            await asyncio.sleep(BOARD_INTERVAL_SECONDS)
+
+    async def run_snapshot_publisher(self):
+        # 바뀐 것이 있는 서버만 모아서 주기적으로 스냅샷을 새로 발행한다
+        while not self.is_closed():
+            for gs in list(self.guild_states.values()):
+                await gs.snapshots.publish(self.now())
+            await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+
+    async def update_board(self, gs: GuildState, now):
+        board = gs.board
+        content = board.render((gs.state.sessions_version, now), lambda: self.progress_lines(gs, now, BOARD_MAX_ROWS))
+        if content is None:
             return
 
-        summary = "**🔄 현재 진행도 현황**\n"
-        for user_id, join_time in self.user_join_times.items():
-            duration = now - join_time
-            hours, remainder = divmod(int(duration.total_seconds()), 3600)
-            minutes, _ = divmod(remainder, 60)
-            summary += f"🔹 <@{user_id}>: {hours}시간 {minutes}분째 진행 중\n"
+        channel = self.get_channel(board.channel_id)
+        if channel is None:
+            return
+        try:
+            await channel.get_partial_message(board.message_id).edit(content=content)
+            board.mark_sent(content)
+            METRICS.inc("board_edits_total")
+        except discord.NotFound:
+            print(f"[ERROR] 진행판 메시지가 삭제되어 진행판을 끕니다. (서버 {gs.guild_id})")
+            gs.board = None
+            save_guild_configs(GUILDS_FILE, self.guild_states)
+        except Exception as e:
+            board.invalidate()
+            print(f"[ERROR] 진행판 갱신 실패: {e}")
 
-        await channel.send(summary)
+    async def remove_board(self, gs: GuildState):
+        board, gs.board = gs.board, None
+        channel = self.get_channel(board.channel_id)
+        if channel is None:
+            return
+        try:
+            await channel.get_partial_message(board.message_id).unpin()
+        except Exception as e:
+            print(f"[ERROR] 진행판 고정 해제 실패: {e}")
 
     async def set_alarm(self, message, minutes):
-        if message.author.id in self.alarms:
-            await message.channel.send(f"⚠️ {message.author.mention}, 이미 설정된 알람이 있습니다! 먼저 삭제하세요. (`!알람삭제`)")
+        if not 0 < minutes <= MAX_ALARM_MINUTES:
+            await message.channel.send(f"⚠️ {message.author.mention}, 알람은 1분부터 {MAX_ALARM_MINUTES}분까지 설정할 수 있습니다.")
+            return
+
+        alarms = self.alarms.user_alarms(message.author.id)
+        if len(alarms) >= MAX_ALARMS_PER_USER:
+            numbers = ", ".join(f"#{alarm['id']} ({alarm['minutes']}분)" for alarm in alarms)
+            await message.channel.send(
+                f"⚠️ {message.author.mention}, 알람은 최대 {MAX_ALARMS_PER_USER}개까지 설정할 수 있습니다! "
+                f"먼저 삭제하세요. (`!알람삭제 <번호>`: {numbers})"
+            )
             return
 
-        task = asyncio.create_task(self.alarm_task(message, minutes))
-        self.alarms[message.author.id] = task
-        await message.channel.send(f"⏳ {minutes}분 뒤에 알람을 설정했습니다! ({message.author.mention})")
+        alarm = self.alarms.schedule(message.author.id, message.channel.id, minutes)
+        await message.channel.send(
+            f"⏳ {minutes}분 뒤에 알람을 설정했습니다! ({message.author.mention}, 번호 #{alarm['id']} · `!알람삭제 {alarm['id']}`로 취소)"
+        )
+
+    async def fire_alarm(self, alarm):
+        channel = self.get_channel(alarm["channel_id"])
+        if channel is None:
+            channel = await self.fetch_channel(alarm["channel_id"])
+        await channel.send(f"⏰ {alarm['minutes']}분이 지났습니다! (<@{alarm['user_id']}>)")
 
-    async def alarm_task(self, message, minutes):
-        await asyncio.sleep(minutes * 60)
-        await message.channel.send(f"⏰ {minutes}분이 지났습니다! ({message.author.mention})")
-        self.alarms.pop(message.author.id, None)
+    async def cancel_alarm(self, message, alarm_id=None):
+        if alarm_id is not None:
+            if self.alarms.cancel(alarm_id, message.author.id):
+                await message.channel.send(f"✅ {message.author.mention}, #{alarm_id} 알람을 삭제했습니다!")
+            else:
+                await message.channel.send(f"⚠️ {message.author.mention}, #{alarm_id} 알람이 없습니다!")
+            return
 
-    async def cancel_alarm(self, message):
-        if message.author.id in self.alarms:
-            self.alarms[message.author.id].cancel()
-            del self.alarms[message.author.id]
+        if self.alarms.cancel_user(message.author.id):
             await message.channel.send(f"✅ {message.author.mention}, 알람을 삭제했습니다!")
         else:
             await message.channel.send(f"⚠️ {message.author.mention}, 삭제할 알람이 없습니다!")
 
-    async def send_weekly_summary(self):
+    async def send_weekly_summary(self, gs: GuildState):
         await self.wait_until_ready()
         while not self.is_closed():
-            now = datetime.now(self.KST)
-            target_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-
-            if now.weekday() == 0 and now >= target_time:
-                target_time += timedelta(days=7)
-            else:
-                target_time += timedelta(days=(7 - now.weekday()) % 7)
+            now = self.now()
+            target_time = gs.next_summary_time(now)
 
             await asyncio.sleep((target_time - now).total_seconds())
+            await self.close_week(gs, target_time)
+            await asyncio.sleep(1)
 
-            await self.flush_active_voice_sessions_until(target_time)
+    async def close_week(self, gs: GuildState, target_time):
+        await self.flush_active_voice_sessions_until(gs, target_time)
 
-            summary = await self.generate_weekly_summary()
+        # 요약/보관할 값을 뜬 뒤 await 없이 초기화한다. 보관에 실패하면 기록을 지우지 않는다.
+        lines = self.weekly_summary_lines(gs)
+        if self.archive_week(gs, (target_time - timedelta(days=7)).date()):
+            gs.state.reset_all()
+        else:
+            print(f"[ERROR] 주간 기록 보관 실패로 초기화를 건너뜁니다. (서버 {gs.guild_id})")
+            lines.append("⚠️ 주간 기록 보관에 실패해서 이번 주 기록을 초기화하지 않았습니다.")
 
-            channel = self.get_channel(CHANNEL_ID)
-            if channel:
-                await channel.send(summary)
+        channel = self.get_channel(gs.channel_id)
+        if channel:
+            await send_paginated(channel, lines)
 
-            self.user_total_time = {str(i): {} for i in range(7)}
-            self.user_daily_time = {str(i): {} for i in range(7)}
-            self.excluded_users.clear()
-            self.save_data()
-            self.save_excluded_users()
+        await gs.state.flush(compact=True)
 
-            await asyncio.sleep(1)
-
-    async def send_weekly_summary_Test(self, channel):
-        now = datetime.now(self.KST)
+    async def send_weekly_summary_Test(self, gs: GuildState, channel):
+        now = self.now()
         cutoff = now.replace(second=0, microsecond=0)
-        await self.flush_active_voice_sessions_until(cutoff)
+        await self.flush_active_voice_sessions_until(gs, cutoff)
 
-        summary = await self.generate_weekly_summary()
-        await channel.send(summary)
+        await send_paginated(channel, self.weekly_summary_lines(gs))
 
-    async def generate_weekly_summary(self):
-        guild = self.get_guild(GUILD_ID)
-        if not guild:
-            return "⚠️ 서버 정보를 가져올 수 없습니다."
-
-        all_members = {str(member.id): member for member in guild.members if not member.bot}
-
-        user_active_days = defaultdict(int)
-        daily_hours = defaultdict(lambda: defaultdict(int))
-
-        summary = "**📊 주간 스터디 이용 요약**\n"
-        days = ["월", "화", "수", "목", "금", "토", "일"]
-
-        successful_users = set()
-        failed_users = set()
-        excluded_users_list = {f"<@{user_id}>" for user_id in self.excluded_users}
-
-        for day, records in self.user_total_time.items():
-            for user_id, seconds in records.items():
-                if user_id in self.excluded_users:
-                    continue
-                daily_hours[user_id][day] = seconds
-                user_active_days[user_id] += 1
-
-        for user_id, active_days in user_active_days.items():
-            valid_total_time = 0
-            valid_days = 0
-
-            for day, seconds in daily_hours[user_id].items():
-                hours = seconds / 3600
-                if active_days == 2 and hours >= 1:
-                    valid_total_time += seconds
-                    valid_days += 1
-                elif active_days == 1 and hours >= 4:
-                    valid_total_time += seconds
-                    valid_days += 1
-                elif active_days >= 3 and hours >= 1:
-                    valid_total_time += seconds
-                    valid_days += 1
-
-            if valid_days < 1 or valid_total_time < 4 * 3600:
-                failed_users.add(f"<@{user_id}>")
-            else:
-                successful_users.add(f"<@{user_id}>")
+    def weekly_summary_lines(self, gs: GuildState):
+        results = gs.state.weekly
 
-        for user_id in all_members.keys():
-            if user_id in self.excluded_users:
-                continue
-            if user_id not in user_active_days:
-                failed_users.add(f"<@{user_id}>")
-
-        summary += "\n".join(
-            [
-                f"🗓 {days[int(day)]}요일:\n"
-                + (
-                    "\n".join(
-                        [
-                            f"  └ <@{user_id}>: {seconds // 3600}시간 {seconds % 3600 // 60}분"
-                            for user_id, seconds in records.items()
-                        ]
-                    )
-                    if records
-                    else "  └ 기록 없음"
-                )
-                for day, records in self.user_total_time.items()
-            ]
-        )
+        lines = ["**📊 주간 스터디 이용 요약**"]
+
+        excluded_users_list = sorted(f"<@{user_id}>" for user_id in gs.state.excluded_users)
+
+        for day in range(7):
+            records = list(gs.state.ledger.day_items(day))
+            lines.append(f"🗓 {DAY_NAMES[day]}요일:")
+            if records:
+                lines.extend(f"  └ <@{user_id}>: {format_duration(seconds)}" for user_id, seconds in records)
+            else:
+                lines.append("  └ 기록 없음")
 
-        failed_users = sorted(set(failed_users) - set(successful_users))
-        successful_users = sorted(set(successful_users))
+        lines.extend(join_items("**✅ 성공한 닝겐**: ", results.successful))
+        lines.extend(join_items("**❌ 실패한 닝겐**: ", results.failed))
+        lines.append("")
+        lines.extend(join_items("🚫 **제외된 닝겐**: ", excluded_users_list))
 
-        summary += f"\n**✅ 성공한 닝겐**: {', '.join(successful_users) if successful_users else '없음'}\n"
-        summary += f"**❌ 실패한 닝겐**: {', '.join(failed_users) if failed_users else '없음'}\n"
-        summary += f"\n🚫 **제외된 닝겐**: {', '.join(sorted(excluded_users_list)) if excluded_users_list else '없음'}"
+        return lines
 
-        return summary
 
+def build_intents():
+    intents = discord.Intents.default()
+    intents.voice_states = True
+    intents.guilds = True
+    intents.members = True
+    intents.messages = True
+    intents.message_content = True
+    return intents
 
-intents = discord.Intents.default()
-intents.voice_states = True
-intents.guilds = True
-intents.members = True
-intents.messages = True
-intents.message_content = True
 
-client = VoiceTrackerBot(intents=intents)
-client.run(TOKEN)
+if __name__ == "__main__":
+    client = VoiceTrackerBot(intents=build_intents())
+    client.run(TOKEN)
@@ -0,0 +1,157 @@
+import asyncio
+import heapq
+import itertools
+import json
+import time
+
+from storage import write_json_atomic
+
+MAX_ALARMS_PER_USER = 10
+MAX_ALARM_MINUTES = 7 * 24 * 60
+
+
+class AlarmScheduler:
+    # 모든 알람을 마감 시각 기준 최소 힙 하나로 관리하고, 코루틴 하나가 가장 빠른 알람까지만 잔다.
+    # 취소된 알람은 딕셔너리에서만 지우고 힙에서는 맨 앞에 올라왔을 때 버린다.
+
+    def __init__(self, path, fire):
+        self.path = path
+        self.fire = fire
+        self.heap = []
+        self.alarms = {}
+        self.by_user = {}
+        self._ids = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._dirty = False
+        self._writing = False
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                alarms = json.load(f)
+        except FileNotFoundError:
+            alarms = []
+        except Exception as e:
+            print(f"[ERROR] 알람 로드 실패: {e}")
+            alarms = []
+
+        for alarm in alarms:
+            self._add(alarm)
+        if self.alarms:
+            self._ids = itertools.count(max(self.alarms) + 1)
+
+    def __len__(self):
+        return len(self.alarms)
+
+    def user_alarms(self, user_id: int):
+        return [self.alarms[alarm_id] for alarm_id in sorted(self.by_user.get(user_id, ()))]
+
+    def schedule(self, user_id: int, channel_id: int, minutes: int, now=None):
+        now = time.time() if now is None else now
+        alarm = {
+            "id": next(self._ids),
+            "user_id": user_id,
+            "channel_id": channel_id,
+            "minutes": minutes,
+            "due": now + minutes * 60,
+        }
+        self._add(alarm)
+        if self.heap[0][1] == alarm["id"]:
+            self._wakeup.set()
+        self._save()
+        return alarm
+
+    def cancel(self, alarm_id: int, user_id=None):
+        alarm = self.alarms.get(alarm_id)
+        if alarm is None or (user_id is not None and alarm["user_id"] != user_id):
+            return False
+        del self.alarms[alarm_id]
+        self._forget(alarm)
+        self._trim()
+        self._save()
+        return True
+
+    def cancel_user(self, user_id: int):
+        alarm_ids = self.by_user.pop(user_id, set())
+        for alarm_id in alarm_ids:
+            self.alarms.pop(alarm_id, None)
+        if alarm_ids:
+            self._trim()
+            self._save()
+        return len(alarm_ids)
+
+    async def run(self):
+        while True:
+            self._trim()
+            if not self.heap:
+                await self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            _, alarm_id = heapq.heappop(self.heap)
+            alarm = self.alarms.pop(alarm_id, None)
+            if alarm is None:
+                continue
+            self._forget(alarm)
+            self._save()
+
+            try:
+                await self.fire(alarm)
+            except Exception as e:
+                print(f"[ERROR] 알람 전송 실패: {e}")
+
+    def _add(self, alarm):
+        self.alarms[alarm["id"]] = alarm
+        self.by_user.setdefault(alarm["user_id"], set()).add(alarm["id"])
+        heapq.heappush(self.heap, (alarm["due"], alarm["id"]))
+
+    def _forget(self, alarm):
+        user_alarms = self.by_user.get(alarm["user_id"])
+        if user_alarms is not None:
+            user_alarms.discard(alarm["id"])
+            if not user_alarms:
+                del self.by_user[alarm["user_id"]]
+
+    def _trim(self):
+        while self.heap and self.heap[0][1] not in self.alarms:
+            heapq.heappop(self.heap)
+        if len(self.heap) > 2 * len(self.alarms) + 64:
+            self.heap = [(alarm["due"], alarm_id) for alarm_id, alarm in self.alarms.items()]
+            heapq.heapify(self.heap)
+
+    def _save(self):
+        self._dirty = True
+        if self._writing:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._dirty = False
+            self._write(list(self.alarms.values()))
+            return
+        self._writing = True
+        loop.create_task(self._flush())
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self._dirty:
+                self._dirty = False
+                await loop.run_in_executor(None, self._write, list(self.alarms.values()))
+        finally:
+            self._writing = False
+
+    def _write(self, alarms):
+        try:
+            write_json_atomic(self.path, alarms)
+        except Exception as e:
+            print(f"[ERROR] 알람 저장 실패: {e}")
@@ -0,0 +1,143 @@
+import json
+import os
+import struct
+from collections import namedtuple
+from datetime import date
+
+from storage import write_json_atomic
+
+RECORD = struct.Struct("<IQ7IB")
+DAY_SECONDS_MAX = 0xFFFFFFFF
+READ_BATCH = 4096
+
+WeekRecord = namedtuple("WeekRecord", ["week_start", "user_id", "day_seconds", "result"])
+
+
+class WeeklyArchive:
+    # 마감된 주마다 유저별 고정 길이 레코드(41바이트)를 데이터 파일 끝에 추가한다.
+    # 인덱스 파일은 주 -> (오프셋, 개수), 유저 -> 레코드 오프셋 목록을 가진다.
+
+    def __init__(self, data_file, index_file):
+        self.data_file = data_file
+        self.index_file = index_file
+        self.weeks = {}
+        self.users = {}
+        self.load_index()
+
+    def load_index(self):
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.weeks = {int(k): tuple(v) for k, v in data["weeks"].items()}
+            self.users = {int(k): v for k, v in data["users"].items()}
+            size = os.path.getsize(self.data_file) if os.path.exists(self.data_file) else 0
+            if size != sum(count for _, count in self.weeks.values()) * RECORD.size:
+                self.rebuild_index()
+        except FileNotFoundError:
+            self.rebuild_index()
+        except Exception as e:
+            print(f"[ERROR] 주간 기록 인덱스 로드 실패: {e}")
+            self.rebuild_index()
+
+    def rebuild_index(self):
+        self.weeks = {}
+        self.users = {}
+        try:
+            with open(self.data_file, "r+b") as f:
+                offset = 0
+                while True:
+                    chunk = f.read(RECORD.size)
+                    if len(chunk) < RECORD.size:
+                        break
+                    week, user_id = RECORD.unpack(chunk)[:2]
+                    start, count = self.weeks.get(week, (offset, 0))
+                    self.weeks[week] = (start, count + 1)
+                    self.users.setdefault(user_id, []).append(offset)
+                    offset += RECORD.size
+                f.truncate(offset)
+        except FileNotFoundError:
+            return
+        self.save_index()
+
+    def save_index(self):
+        try:
+            write_json_atomic(
+                self.index_file,
+                {
+                    "weeks": {str(k): list(v) for k, v in self.weeks.items()},
+                    "users": {str(k): v for k, v in self.users.items()},
+                },
+                separators=(",", ":"),
+            )
+        except Exception as e:
+            print(f"[ERROR] 주간 기록 인덱스 저장 실패: {e}")
+
+    def append_week(self, week_start: date, rows):
+        # 보관에 성공했거나 보관할 것이 없으면 True. 요일 칸은 uint32라 넘치는 값은 최대값으로 저장한다.
+        week = week_start.toordinal()
+        if not rows:
+            return True
+        if week in self.weeks:
+            print(f"[ERROR] 이미 보관된 주입니다: {week_start}")
+            return False
+
+        try:
+            data = b"".join(
+                RECORD.pack(week, user_id, *(min(seconds, DAY_SECONDS_MAX) for seconds in day_seconds), result)
+                for user_id, day_seconds, result in rows
+            )
+            with open(self.data_file, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            print(f"[ERROR] 주간 기록 저장 실패: {e}")
+            return False
+
+        self.weeks[week] = (offset, len(rows))
+        for i, (user_id, _, _) in enumerate(rows):
+            self.users.setdefault(user_id, []).append(offset + i * RECORD.size)
+        self.save_index()
+        return True
+
+    def week_records(self, week_start: date):
+        entry = self.weeks.get(week_start.toordinal())
+        if entry is None:
+            return []
+        offset, count = entry
+        with open(self.data_file, "rb") as f:
+            f.seek(offset)
+            data = f.read(count * RECORD.size)
+        return [decode_record(values) for values in RECORD.iter_unpack(data)]
+
+    def user_history(self, user_id: int, limit=12):
+        offsets = self.users.get(user_id, [])[-limit:]
+        if not offsets:
+            return []
+        result = []
+        with open(self.data_file, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                result.append(decode_record(RECORD.unpack(f.read(RECORD.size))))
+        return result
+
+
+def decode_record(values):
+    return WeekRecord(date.fromordinal(values[0]), values[1], values[2:9], values[9])
+
+
+def iter_records(data_file, batch=READ_BATCH):
+    # 인덱스 없이 데이터 파일을 앞에서부터 묶음 단위로 읽는다. 파일은 건드리지 않고 잘린 꼬리는 무시한다.
+    try:
+        f = open(data_file, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        while True:
+            data = f.read(RECORD.size * batch)
+            usable = len(data) - len(data) % RECORD.size
+            for values in RECORD.iter_unpack(data[:usable]):
+                yield decode_record(values)
+            if len(data) < RECORD.size * batch:
+                return
@@ -0,0 +1,268 @@
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import TimeCheck
+from render import paginate
+
+BASELINE_FILE = "bench_baselines.json"
+DEFAULT_SIZES = [100, 1000, 10000]
+VOICE_CHANNELS = 20
+
+
+class StubChannel:
+    def __init__(self, channel_id, members=None):
+        self.id = channel_id
+        self.members = members if members is not None else []
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class StubMember:
+    def __init__(self, member_id, name, guild, bot=False):
+        self.id = member_id
+        self.name = name
+        self.display_name = name
+        self.bot = bot
+        self.guild = guild
+        self.mention = f"<@{member_id}>"
+
+
+class StubVoiceState:
+    def __init__(self, channel=None):
+        self.channel = channel
+
+
+class StubGuild:
+    def __init__(self, guild_id, size, rng):
+        self.id = guild_id
+        self.members = [StubMember(10**17 + i, f"member{i}-{rng.randrange(10**6)}", self) for i in range(size)]
+        self.voice_channels = [StubChannel(1000 + i) for i in range(VOICE_CHANNELS)]
+        self.afk_channel = None
+
+    def get_member(self, member_id):
+        return None
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, peak_bytes):
+    total = sum(latencies)
+    return {
+        "ops_per_sec": len(latencies) / total if total else float("inf"),
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "peak_kib": peak_bytes / 1024,
+    }
+
+
+class Scenario:
+    def __init__(self, size, seed):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.bot = TimeCheck.VoiceTrackerBot(intents=TimeCheck.build_intents())
+        self.gs = self.bot.guild_states[TimeCheck.GUILD_ID]
+        self.guild = StubGuild(TimeCheck.GUILD_ID, size, self.rng)
+        self.report_channel = StubChannel(TimeCheck.CHANNEL_ID)
+        self.bot.get_guild = lambda guild_id: self.guild if guild_id == self.guild.id else None
+        self.bot.get_channel = lambda channel_id: self.report_channel
+        self.bot.load_guild_members(self.gs, self.guild)
+        self.gs.state.debounce = 3600
+
+        now = self.now()
+        active = self.guild.members[: max(1, size // 10)]
+        for i, member in enumerate(active):
+            channel = self.guild.voice_channels[i % VOICE_CHANNELS]
+            channel.members.append(member)
+            self.gs.state.start_session(member.id, now - timedelta(minutes=self.rng.randint(21, 30 * 60)))
+        self.gs.presence.sync(self.guild.voice_channels)
+        for member in self.guild.members:
+            for day in self.rng.sample(range(7), self.rng.randint(0, 4)):
+                self.gs.state.credit(member.id, day, self.rng.randint(60, 5 * 3600))
+        self.active = active
+
+    def now(self):
+        return datetime.now(self.bot.KST)
+
+    async def voice_leave(self):
+        member = self.rng.choice(self.active)
+        if member.id not in self.gs.state.user_join_times:
+            self.gs.state.start_session(member.id, self.now() - timedelta(hours=self.rng.randint(1, 30)))
+        channel = self.guild.voice_channels[0]
+        start = time.perf_counter()
+        await self.bot.on_voice_state_update(member, StubVoiceState(channel), StubVoiceState(None))
+        elapsed = time.perf_counter() - start
+        self.gs.presence.move(member.id, channel.id)
+        return elapsed
+
+    async def voice_noop(self):
+        member = self.rng.choice(self.active)
+        channel = self.guild.voice_channels[0]
+        start = time.perf_counter()
+        await self.bot.on_voice_state_update(member, StubVoiceState(channel), StubVoiceState(channel))
+        return time.perf_counter() - start
+
+    async def flush_sessions(self):
+        start = time.perf_counter()
+        await self.bot.flush_active_voice_sessions_until(self.gs, self.now().replace(microsecond=0))
+        elapsed = time.perf_counter() - start
+        for member in self.active:
+            self.gs.state.start_session(member.id, self.now() - timedelta(hours=self.rng.randint(1, 30)))
+        return elapsed
+
+    async def weekly_summary(self):
+        start = time.perf_counter()
+        for _ in paginate(self.bot.weekly_summary_lines(self.gs)):
+            pass
+        return time.perf_counter() - start
+
+    async def find_member(self):
+        member = self.rng.choice(self.guild.members)
+        key = member.name.split("-")[0] if self.rng.random() < 0.5 else member.name
+        start = time.perf_counter()
+        self.bot.find_member_by_name(self.guild, key)
+        return time.perf_counter() - start
+
+    async def save_data(self):
+        self.gs.state.credit(self.rng.choice(self.guild.members).id, self.rng.randrange(7), 60)
+        start = time.perf_counter()
+        await self.gs.state.flush(compact=True)
+        return time.perf_counter() - start
+
+    async def load_data(self):
+        start = time.perf_counter()
+        self.gs.state.load()
+        return time.perf_counter() - start
+
+
+BENCHMARKS = {
+    "on_voice_state_update": ("voice_leave", 2000),
+    "on_voice_state_update_noop": ("voice_noop", 5000),
+    "flush_active_voice_sessions_until": ("flush_sessions", 20),
+    "generate_weekly_summary": ("weekly_summary", 20),
+    "find_member_by_name": ("find_member", 2000),
+    "save_data": ("save_data", 20),
+    "load_data": ("load_data", 20),
+}
+
+
+async def run_benchmark(scenario, method, iterations):
+    fn = getattr(scenario, method)
+    for _ in range(min(5, iterations)):
+        await fn()
+
+    gc.collect()
+    latencies = [await fn() for _ in range(iterations)]
+
+    tracemalloc.start()
+    await fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return summarize(latencies, peak)
+
+
+def run_size(size, names, seed, scale):
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        cwd = os.getcwd()
+        os.chdir(data_dir)
+        try:
+            async def main():
+                scenario = Scenario(size, seed)
+                for name in names:
+                    method, iterations = BENCHMARKS[name]
+                    iterations = max(3, int(iterations * scale))
+                    results[name] = await run_benchmark(scenario, method, iterations)
+                for task in asyncio.all_tasks() - {asyncio.current_task()}:
+                    task.cancel()
+
+            asyncio.run(main())
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, sizes in results.items():
+        for size, stats in sizes.items():
+            base = baseline.get(name, {}).get(size)
+            if not base:
+                continue
+            if stats["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+                regressions.append(
+                    f"{name}[{size}]: {stats['ops_per_sec']:.1f} ops/s (기준 {base['ops_per_sec']:.1f} ops/s)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TimeCheck 핫패스 마이크로 벤치마크")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="멤버 수 목록 (예: 100,1000,100000)")
+    parser.add_argument("--only", default=None, help="실행할 벤치마크 이름 목록 (쉼표 구분)")
+    parser.add_argument("--scale", type=float, default=1.0, help="반복 횟수 배율")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="결과를 기준값으로 저장")
+    parser.add_argument("--compare", action="store_true", help="기준값과 비교해 회귀가 있으면 실패")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 처리량 감소 비율")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+
+    results = {name: {} for name in names}
+    print(f"{'benchmark':<36}{'members':>9}{'ops/s':>12}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'peak KiB':>11}")
+    for size in sizes:
+        for name, stats in run_size(size, names, args.seed, args.scale).items():
+            results[name][str(size)] = stats
+            print(
+                f"{name:<36}{size:>9}{stats['ops_per_sec']:>12.1f}{stats['p50_us']:>11.1f}"
+                f"{stats['p95_us']:>11.1f}{stats['p99_us']:>11.1f}{stats['peak_kib']:>11.1f}"
+            )
+
+    baseline_path = os.path.abspath(args.baseline)
+    if args.save:
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        for name, stats in results.items():
+            baseline.setdefault(name, {}).update(stats)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=4)
+        print(f"기준값 저장: {baseline_path}")
+
+    if args.compare:
+        try:
+            with open(baseline_path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"[ERROR] 기준값 파일이 없습니다: {baseline_path}")
+            return 2
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"[REGRESSION] {line}")
+        if regressions:
+            return 1
+        print("회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,54 @@
+from render import paginate
+
+BOARD_INTERVAL_SECONDS = 20
+# 한 메시지(2000자)에 들어가도록 진행판에는 이만큼만 적고 나머지는 "외 N명"으로 줄인다
+BOARD_MAX_ROWS = 20
+BOARD_LINK_INTERVAL_SECONDS = 60
+
+
+class ProgressBoard:
+    # 보고 채널에 고정된 진행도 메시지 하나. 세션 목록 버전과 분(minute)이 같으면 다시 그리지 않고,
+    # 그린 내용이 지난번과 같으면 수정 요청을 보내지 않는다.
+
+    def __init__(self, channel_id: int, message_id: int):
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.last_key = None
+        self.last_content = None
+        self.linked = {}
+
+    def render(self, key, render_lines):
+        # 바뀐 내용이 있을 때만 문자열을 돌려준다
+        if key == self.last_key:
+            return None
+        self.last_key = key
+        content = next(paginate(render_lines()), "")
+        if content == self.last_content:
+            return None
+        return content
+
+    def mark_sent(self, content):
+        self.last_content = content
+
+    def invalidate(self):
+        self.last_key = None
+
+    def link_due(self, channel_id: int, now: float):
+        # !진행도에 링크로 답하는 것도 채널마다 BOARD_LINK_INTERVAL_SECONDS에 한 번만
+        last = self.linked.get(channel_id)
+        if last is not None and now - last < BOARD_LINK_INTERVAL_SECONDS:
+            return False
+        self.linked[channel_id] = now
+        return True
+
+    def jump_url(self, guild_id: int):
+        return f"https://discord.com/channels/{guild_id}/{self.channel_id}/{self.message_id}"
+
+    def to_config(self):
+        return {"channel_id": self.channel_id, "message_id": self.message_id}
+
+    @classmethod
+    def from_config(cls, config):
+        if not config:
+            return None
+        return cls(int(config["channel_id"]), int(config["message_id"]))
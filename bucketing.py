@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+KST_OFFSET_SECONDS = 9 * 3600
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+SECOND_US = 1_000_000
+DAY_SECONDS = 86400
+DAY_US = DAY_SECONDS * SECOND_US
+EPOCH_WEEKDAY = 3
+
+
+def to_epoch_us(moment: datetime):
+    return (moment - EPOCH) // MICROSECOND
+
+
+def add_interval_us(slots, start_us, end_us, offset_us):
+    # 현지 자정 기준으로 첫날/가운데 온전한 날들/마지막 날로 나눠 요일 칸에 더한다.
+    # 조각마다 초 미만을 버리므로 예전 while 루프의 int(total_seconds())와 결과가 같다.
+    # 고치면 `python replay.py bucketing`으로 예전 루프와 다시 비교할 것.
+    local_start = start_us + offset_us
+    local_end = end_us + offset_us
+    first_day = local_start // DAY_US
+    last_day = (local_end - 1) // DAY_US
+
+    if first_day == last_day:
+        slots[(first_day + EPOCH_WEEKDAY) % 7] += (local_end - local_start) // SECOND_US
+        return
+
+    slots[(first_day + EPOCH_WEEKDAY) % 7] += ((first_day + 1) * DAY_US - local_start) // SECOND_US
+
+    full_days = last_day - first_day - 1
+    weeks, rest = divmod(full_days, 7)
+    if weeks:
+        for weekday in range(7):
+            slots[weekday] += weeks * DAY_SECONDS
+    for day in range(first_day + 1, first_day + 1 + rest):
+        slots[(day + EPOCH_WEEKDAY) % 7] += DAY_SECONDS
+
+    slots[(last_day + EPOCH_WEEKDAY) % 7] += (local_end - last_day * DAY_US) // SECOND_US
+
+
+def split_session(start: datetime, end: datetime, utc_offset=KST_OFFSET_SECONDS):
+    slots = [0] * 7
+    start_us = to_epoch_us(start)
+    end_us = to_epoch_us(end)
+    if end_us > start_us:
+        add_interval_us(slots, start_us, end_us, utc_offset * SECOND_US)
+    return slots
+
+
+def bucket_sessions(sessions, utc_offset=KST_OFFSET_SECONDS):
+    offset_us = utc_offset * SECOND_US
+    totals = {}
+    for user_id, start, end in sessions:
+        start_us = to_epoch_us(start)
+        end_us = to_epoch_us(end)
+        if end_us <= start_us:
+            continue
+        slots = totals.get(user_id)
+        if slots is None:
+            slots = totals[user_id] = [0] * 7
+        add_interval_us(slots, start_us, end_us, offset_us)
+    return totals
@@ -0,0 +1,141 @@
+import time
+
+from metrics import METRICS
+
+PREFIX = "!"
+NOTICE_INTERVAL_SECONDS = 10.0
+
+
+def positive_int(args):
+    parts = args.split()
+    if len(parts) != 1:
+        return None
+    try:
+        value = int(parts[0])
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def whole_int(args):
+    # 숫자 명령용. 너무 긴 숫자 문자열은 int()가 ValueError를 내므로 None으로 돌린다
+    try:
+        return int(args)
+    except ValueError:
+        return None
+
+
+class Command:
+    __slots__ = ("name", "handler", "parse", "takes_args", "needs_state", "cooldown", "max_concurrency")
+
+    def __init__(self, name, handler, parse=None, takes_args=False, needs_state=True, cooldown=0.0, max_concurrency=None):
+        self.name = name
+        self.handler = handler
+        self.parse = parse
+        self.takes_args = takes_args or parse is not None
+        self.needs_state = needs_state
+        self.cooldown = cooldown
+        self.max_concurrency = max_concurrency
+
+
+class CommandRouter:
+    # 첫 글자가 접두사가 아니면 바로 버리고, 명령 이름은 딕셔너리 한 번으로 찾는다.
+    # 인자는 한 번만 파싱하고, 유저별 쿨다운과 서버+명령별/유저별 동시 실행 수를 제한한다.
+    # 쿨다운/동시 실행으로 거절하면 유저별로 NOTICE_INTERVAL_SECONDS에 한 번만 안내한다.
+
+    def __init__(self, resolve_state, prefix=PREFIX, clock=time.monotonic):
+        self.resolve_state = resolve_state
+        self.prefix = prefix
+        self.clock = clock
+        self.commands = {}
+        self.numeric = None
+        self.last_used = {}
+        self.last_notice = {}
+        self.in_flight = set()
+        self.running = {}
+
+    def register(self, name, handler, **options):
+        self.commands[name] = Command(name, handler, **options)
+
+    def register_numeric(self, handler, **options):
+        self.numeric = Command("<숫자>", handler, parse=whole_int, **options)
+
+    async def dispatch(self, message, now=None):
+        content = message.content
+        if content[:1] != self.prefix:
+            return False
+
+        parts = content[1:].split(maxsplit=1)
+        if not parts or content[1].isspace():
+            return False
+        name = parts[0]
+        args = parts[1] if len(parts) > 1 else ""
+        command = self.commands.get(name)
+        if command is None:
+            if self.numeric is None or args or not name.isdecimal():
+                return False
+            command, args = self.numeric, name
+
+        args = args.strip()
+        if command.takes_args:
+            if command.parse is not None:
+                args = command.parse(args)
+                if args is None:
+                    return False
+        elif args:
+            return False
+
+        state = None
+        if command.needs_state:
+            state = self.resolve_state(message)
+            if state is None:
+                return False
+
+        now = self.clock() if now is None else now
+        user_key = (message.author.id, command.name)
+        guild_key = (message.guild.id if message.guild else None, command.name)
+        if user_key in self.in_flight:
+            return await self._reject(message, now)
+        if command.max_concurrency is not None and self.running.get(guild_key, 0) >= command.max_concurrency:
+            return await self._reject(message, now)
+
+        if command.cooldown:
+            last = self.last_used.get(user_key)
+            if last is not None and now - last < command.cooldown:
+                return await self._reject(message, now)
+            self.last_used[user_key] = now
+            if len(self.last_used) > 10000:
+                self._prune(now)
+
+        self.in_flight.add(user_key)
+        self.running[guild_key] = self.running.get(guild_key, 0) + 1
+        try:
+            with METRICS.time("command_latency_seconds", command=command.name):
+                await command.handler(message, state, args)
+        finally:
+            if self.running[guild_key] == 1:
+                del self.running[guild_key]
+            else:
+                self.running[guild_key] -= 1
+            self.in_flight.discard(user_key)
+        return True
+
+    async def _reject(self, message, now):
+        METRICS.inc("commands_rejected_total")
+        user_id = message.author.id
+        last = self.last_notice.get(user_id)
+        if last is not None and now - last < NOTICE_INTERVAL_SECONDS:
+            return False
+        self.last_notice[user_id] = now
+        try:
+            await message.channel.send(f"⏳ {message.author.mention}, 잠시 후 다시 시도해주세요.")
+        except Exception as e:
+            print(f"[ERROR] 안내 메시지 전송 실패: {e}")
+        return False
+
+    def _prune(self, now):
+        longest = max((c.cooldown for c in self.commands.values()), default=0.0)
+        if self.numeric is not None:
+            longest = max(longest, self.numeric.cooldown)
+        self.last_used = {key: used for key, used in self.last_used.items() if now - used < longest}
+        self.last_notice = {key: sent for key, sent in self.last_notice.items() if now - sent < NOTICE_INTERVAL_SECONDS}
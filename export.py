@@ -0,0 +1,211 @@
+import argparse
+import csv
+import json
+import os
+import sys
+
+from archive import iter_records
+from guilds import ARCHIVE_FILE, DATA_FILE, EXCLUDED_USERS_FILE, JOIN_DATA_FILE, LEDGER_FILE, SESSION_LOG_FILE
+from storage import SessionLogStore
+from weekly import DAY_NAMES, RESULT_EXCLUDED, RESULT_FAIL, RESULT_SUCCESS, is_week_successful
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PARQUET_BATCH = 65536
+DAY_COLUMNS = [(f"{name}_seconds", "int") for name in ("mon", "tue", "wed", "thu", "fri", "sat", "sun")]
+RESULT_NAMES = {RESULT_SUCCESS: "success", RESULT_FAIL: "fail", RESULT_EXCLUDED: "excluded"}
+
+TABLES = {
+    "weekly_history": [("week_start", "str"), ("user_id", "int")] + DAY_COLUMNS + [("total_seconds", "int"), ("result", "str")],
+    "current_week": [("user_id", "int")] + DAY_COLUMNS + [("total_seconds", "int"), ("result", "str")],
+    "active_sessions": [("user_id", "int"), ("join_time", "str")],
+    "user_totals": [
+        ("user_id", "int"),
+        ("weeks", "int"),
+        ("success_weeks", "int"),
+        ("fail_weeks", "int"),
+        ("excluded_weeks", "int"),
+        ("success_rate", "float"),
+        ("total_seconds", "int"),
+    ]
+    + DAY_COLUMNS,
+    "week_summary": [
+        ("week_start", "str"),
+        ("members", "int"),
+        ("success", "int"),
+        ("fail", "int"),
+        ("excluded", "int"),
+        ("success_rate", "float"),
+        ("total_seconds", "int"),
+    ],
+    "weekday_distribution": [("weekday", "str"), ("seconds", "int"), ("share", "float")],
+}
+
+
+class CsvSink:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    # 행을 PARQUET_BATCH개씩 모아 row group 하나로 쓴다. 메모리에는 한 묶음만 남는다.
+
+    TYPES = {"int": "int64", "str": "string", "float": "float64"}
+
+    def __init__(self, path, columns, batch=PARQUET_BATCH):
+        self.schema = pyarrow.schema([(name, getattr(pyarrow, self.TYPES[kind])()) for name, kind in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.batch = batch
+        self.rows = []
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        columns = [list(column) for column in zip(*self.rows)]
+        self.writer.write_table(pyarrow.Table.from_arrays(columns, schema=self.schema))
+        self.rows = []
+
+
+def open_sink(out_dir, name, fmt):
+    if fmt == "parquet":
+        return ParquetSink(os.path.join(out_dir, f"{name}.parquet"), TABLES[name])
+    return CsvSink(os.path.join(out_dir, f"{name}.csv"), TABLES[name])
+
+
+def load_excluded(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return {int(user_id) for user_id in json.load(f)}
+    except FileNotFoundError:
+        return set()
+
+
+def success_rate(success, fail):
+    return success / (success + fail) if success + fail else 0.0
+
+
+def export(data_dir, out_dir, fmt="csv"):
+    # 닫힌 주는 보관 파일에서 한 레코드씩 읽어 바로 내보내고, 집계는 유저/주/요일 단위 합계만 메모리에 둔다.
+    def path(filename):
+        return os.path.join(data_dir, filename)
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    users = {}
+    weeks = {}
+    weekday_seconds = [0] * 7
+
+    sink = open_sink(out_dir, "weekly_history", fmt)
+    try:
+        for record in iter_records(path(ARCHIVE_FILE)):
+            total = sum(record.day_seconds)
+            sink.write([record.week_start.isoformat(), record.user_id, *record.day_seconds, total, RESULT_NAMES[record.result]])
+
+            user = users.get(record.user_id)
+            if user is None:
+                user = users[record.user_id] = [0, 0, 0, [0] * 7]
+            user[record.result] += 1
+            week = weeks.get(record.week_start)
+            if week is None:
+                week = weeks[record.week_start] = [0, 0, 0, 0]
+            week[record.result] += 1
+            week[3] += total
+            for day, seconds in enumerate(record.day_seconds):
+                user[3][day] += seconds
+                weekday_seconds[day] += seconds
+    finally:
+        sink.close()
+
+    sink = open_sink(out_dir, "user_totals", fmt)
+    try:
+        for user_id in sorted(users):
+            fail, success, excluded, day_seconds = users[user_id]
+            sink.write(
+                [user_id, fail + success + excluded, success, fail, excluded, success_rate(success, fail), sum(day_seconds), *day_seconds]
+            )
+    finally:
+        sink.close()
+
+    sink = open_sink(out_dir, "week_summary", fmt)
+    try:
+        for week_start in sorted(weeks):
+            fail, success, excluded, total = weeks[week_start]
+            sink.write([week_start.isoformat(), fail + success + excluded, success, fail, excluded, success_rate(success, fail), total])
+    finally:
+        sink.close()
+
+    sink = open_sink(out_dir, "weekday_distribution", fmt)
+    try:
+        total = sum(weekday_seconds)
+        for day, seconds in enumerate(weekday_seconds):
+            sink.write([DAY_NAMES[day], seconds, seconds / total if total else 0.0])
+    finally:
+        sink.close()
+
+    # 진행 중인 주: 스냅샷 + 세션 로그를 읽기 전용으로 재생한다. 멤버 목록이 없으므로 기록/제외가 있는 유저만 나온다.
+    store = SessionLogStore(path(LEDGER_FILE), path(JOIN_DATA_FILE), path(SESSION_LOG_FILE), legacy_data_file=path(DATA_FILE))
+    ledger, user_join_times = store.load(repair=False)
+    excluded_users = load_excluded(path(EXCLUDED_USERS_FILE))
+
+    sink = open_sink(out_dir, "current_week", fmt)
+    try:
+        for user_id, day_seconds in sorted(ledger.items()):
+            if user_id in excluded_users:
+                result = RESULT_EXCLUDED
+            else:
+                result = RESULT_SUCCESS if is_week_successful(day_seconds) else RESULT_FAIL
+            sink.write([user_id, *day_seconds, sum(day_seconds), RESULT_NAMES[result]])
+        for user_id in sorted(excluded_users - ledger.index.keys()):
+            sink.write([user_id] + [0] * 8 + [RESULT_NAMES[RESULT_EXCLUDED]])
+    finally:
+        sink.close()
+
+    sink = open_sink(out_dir, "active_sessions", fmt)
+    try:
+        for user_id, join_time in sorted(user_join_times.items()):
+            sink.write([user_id, join_time.isoformat()])
+    finally:
+        sink.close()
+
+    return len(users), len(weeks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TimeCheck 기록 오프라인 내보내기 (디스코드 연결/토큰 불필요)")
+    parser.add_argument("--data-dir", default=".", help="서버 데이터 폴더 (기본 서버는 ., 그 외는 data/<서버 ID>)")
+    parser.add_argument("--out", default="export", help="출력 폴더")
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv")
+    args = parser.parse_args(argv)
+
+    if args.format == "parquet" and pyarrow is None:
+        print("[ERROR] parquet 출력에는 pyarrow가 필요합니다. (pip install pyarrow)")
+        return 2
+
+    users, weeks = export(args.data_dir, args.out, args.format)
+    print(f"내보내기 완료: {os.path.abspath(args.out)} (보관된 주 {weeks}개, 유저 {users}명)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
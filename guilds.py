@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import timedelta
+
+from archive import WeeklyArchive
+from board import ProgressBoard
+from member_cache import MemberCache
+from member_index import MemberNameIndex
+from presence import VoicePresence
+from snapshot import SnapshotPublisher
+from state import StateManager
+from storage import SessionLogStore, write_json_atomic
+
+DATA_FILE = "voice_data.json"
+LEDGER_FILE = "voice_ledger.bin"
+EXCLUDED_USERS_FILE = "excluded_users.json"
+JOIN_DATA_FILE = "voice_join_data.json"
+SESSION_LOG_FILE = "voice_session_log.jsonl"
+ARCHIVE_FILE = "weekly_archive.bin"
+ARCHIVE_INDEX_FILE = "weekly_archive_index.json"
+ROSTER_FILE = "roster.bin"
+GUILD_DATA_DIR = "data"
+
+
+class GuildState:
+    def __init__(
+        self, guild_id: int, channel_id, data_dir=None, summary_weekday=0, summary_hour=0, board=None, excluded_channels=()
+    ):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.board = board
+        self.excluded_channels = set(excluded_channels)
+        self.afk_channel_id = None
+        self.data_dir = data_dir or os.path.join(GUILD_DATA_DIR, str(guild_id))
+        self.summary_weekday = summary_weekday
+        self.summary_hour = summary_hour
+
+        os.makedirs(self.data_dir, exist_ok=True)
+        self.state = StateManager(
+            SessionLogStore(
+                self.path(LEDGER_FILE),
+                self.path(JOIN_DATA_FILE),
+                self.path(SESSION_LOG_FILE),
+                legacy_data_file=self.path(DATA_FILE),
+            ),
+            self.path(EXCLUDED_USERS_FILE),
+            self.path(ROSTER_FILE),
+        )
+        self.state.load()
+        self.snapshots = SnapshotPublisher(guild_id, self.state)
+        self.archive = WeeklyArchive(self.path(ARCHIVE_FILE), self.path(ARCHIVE_INDEX_FILE))
+        self.member_index = MemberNameIndex()
+        self.members = MemberCache()
+        self.presence = VoicePresence()
+
+    def path(self, filename):
+        return os.path.join(self.data_dir, filename)
+
+    def is_counted(self, channel_id):
+        # 잠수 채널과 제외된 채널에 있는 시간은 공부 시간으로 세지 않는다
+        return channel_id is not None and channel_id != self.afk_channel_id and channel_id not in self.excluded_channels
+
+    def next_summary_time(self, now):
+        target = now.replace(hour=self.summary_hour, minute=0, second=0, microsecond=0)
+        target += timedelta(days=(self.summary_weekday - now.weekday()) % 7)
+        if target <= now:
+            target += timedelta(days=7)
+        return target
+
+    def to_config(self):
+        return {
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+            "data_dir": self.data_dir,
+            "summary_weekday": self.summary_weekday,
+            "summary_hour": self.summary_hour,
+            "board": self.board.to_config() if self.board else None,
+            "excluded_channels": sorted(self.excluded_channels),
+        }
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            int(config["guild_id"]),
+            config.get("channel_id"),
+            data_dir=config.get("data_dir"),
+            summary_weekday=config.get("summary_weekday", 0),
+            summary_hour=config.get("summary_hour", 0),
+            board=ProgressBoard.from_config(config.get("board")),
+            excluded_channels=[int(channel_id) for channel_id in config.get("excluded_channels", [])],
+        )
+
+
+def load_guild_states(path, default_configs=()):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            configs = json.load(f)
+    except FileNotFoundError:
+        configs = list(default_configs)
+    except Exception as e:
+        print(f"[ERROR] 서버 설정 로드 실패: {e}")
+        configs = list(default_configs)
+
+    guild_states = {}
+    for config in configs:
+        guild_state = GuildState.from_config(config)
+        guild_states[guild_state.guild_id] = guild_state
+    return guild_states
+
+
+def save_guild_configs(path, guild_states):
+    try:
+        write_json_atomic(path, [gs.to_config() for gs in guild_states.values()], indent=4)
+    except Exception as e:
+        print(f"[ERROR] 서버 설정 저장 실패: {e}")
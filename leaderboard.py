@@ -0,0 +1,76 @@
+import bisect
+import heapq
+
+from ledger import TimeLedger
+from weekly import DAY_NAMES
+
+DEFAULT_TOP = 10
+
+
+class Leaderboard:
+    # 주간 합계 순위는 (-합계, 유저 ID) 정렬 리스트로 유지해서 상위 K는 앞에서 자르고 순위는 이분 탐색으로 구한다.
+    # 요일별 상위 K는 힙으로 뽑아 캐시하고, 적립이 일어나면 캐시를 비운다.
+
+    def __init__(self):
+        self.ledger = TimeLedger()
+        self.totals = {}
+        self.keys = []
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def rebuild(self, ledger: TimeLedger):
+        self.ledger = ledger
+        self.totals = {}
+        for user_id, day_seconds in ledger.items():
+            total = sum(day_seconds)
+            if total > 0:
+                self.totals[user_id] = total
+        self.keys = sorted((-total, user_id) for user_id, total in self.totals.items())
+        self.cache = {}
+
+    def refresh(self, user_id: int):
+        self.cache = {}
+        day_seconds = self.ledger.user(user_id)
+        total = sum(day_seconds) if day_seconds is not None else 0
+
+        old = self.totals.get(user_id)
+        if old == total:
+            return
+        if old is not None:
+            i = bisect.bisect_left(self.keys, (-old, user_id))
+            del self.keys[i]
+
+        if total > 0:
+            self.totals[user_id] = total
+            bisect.insort(self.keys, (-total, user_id))
+        else:
+            self.totals.pop(user_id, None)
+
+    def top(self, k=DEFAULT_TOP, day=None):
+        key = (day, k)
+        result = self.cache.get(key)
+        if result is None:
+            if day is None:
+                result = [(user_id, -total) for total, user_id in self.keys[:k]]
+            else:
+                result = heapq.nlargest(k, self.ledger.day_items(day), key=lambda item: item[1])
+            self.cache[key] = result
+        return result
+
+    def rank(self, user_id: int):
+        # 동점이면 같은 순위. 기록이 없으면 None
+        total = self.totals.get(user_id)
+        if total is None:
+            return None, 0
+        return bisect.bisect_left(self.keys, (-total,)) + 1, total
+
+
+def parse_day(text):
+    text = text.strip()
+    if text.endswith("요일"):
+        text = text[:-2]
+    if text in DAY_NAMES:
+        return DAY_NAMES.index(text)
+    return None
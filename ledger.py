@@ -0,0 +1,115 @@
+import struct
+import sys
+from array import array
+
+DAYS = 7
+HEADER = struct.Struct("<4sIII")
+MAGIC = b"TCL1"
+
+
+class TimeLedger:
+    # 유저 ID -> 슬롯 번호 딕셔너리 하나와 평평한 배열 두 개(유저 ID, 유저당 요일 7칸 초)로 주간 시간을 보관한다.
+    # 삭제는 마지막 슬롯을 빈 자리로 옮겨서 O(1)로 처리한다.
+
+    __slots__ = ("index", "user_ids", "seconds")
+
+    def __init__(self):
+        self.index = {}
+        self.user_ids = array("Q")
+        self.seconds = array("q")
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, user_id):
+        return user_id in self.index
+
+    def credit(self, user_id: int, day: int, seconds: int):
+        slot = self.index.get(user_id)
+        if slot is None:
+            slot = len(self.user_ids)
+            self.index[user_id] = slot
+            self.user_ids.append(user_id)
+            self.seconds.extend((0,) * DAYS)
+        self.seconds[slot * DAYS + day] += seconds
+
+    def user(self, user_id: int):
+        slot = self.index.get(user_id)
+        if slot is None:
+            return None
+        return self.seconds[slot * DAYS:(slot + 1) * DAYS].tolist()
+
+    def remove(self, user_id: int):
+        slot = self.index.pop(user_id, None)
+        if slot is None:
+            return False
+        last = len(self.user_ids) - 1
+        if slot != last:
+            moved = self.user_ids[last]
+            self.user_ids[slot] = moved
+            self.seconds[slot * DAYS:(slot + 1) * DAYS] = self.seconds[last * DAYS:]
+            self.index[moved] = slot
+        del self.user_ids[last]
+        del self.seconds[last * DAYS:]
+        return True
+
+    def clear(self):
+        self.index = {}
+        self.user_ids = array("Q")
+        self.seconds = array("q")
+
+    def items(self):
+        seconds = self.seconds
+        for slot, user_id in enumerate(self.user_ids):
+            yield user_id, seconds[slot * DAYS:(slot + 1) * DAYS].tolist()
+
+    def day_items(self, day: int):
+        seconds = self.seconds
+        for slot, user_id in enumerate(self.user_ids):
+            value = seconds[slot * DAYS + day]
+            if value:
+                yield user_id, value
+
+    def copy(self):
+        ledger = TimeLedger()
+        ledger.index = dict(self.index)
+        ledger.user_ids = array("Q", self.user_ids)
+        ledger.seconds = array("q", self.seconds)
+        return ledger
+
+    def to_bytes(self, generation=0):
+        user_ids = self.user_ids
+        seconds = self.seconds
+        if sys.byteorder != "little":
+            user_ids = array("Q", user_ids)
+            seconds = array("q", seconds)
+            user_ids.byteswap()
+            seconds.byteswap()
+        return HEADER.pack(MAGIC, 1, generation, len(user_ids)) + user_ids.tobytes() + seconds.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, generation, count = HEADER.unpack_from(data)
+        if magic != MAGIC or version != 1:
+            raise ValueError("알 수 없는 기록 파일 형식")
+
+        ledger = cls()
+        offset = HEADER.size
+        ledger.user_ids.frombytes(data[offset:offset + count * 8])
+        offset += count * 8
+        ledger.seconds.frombytes(data[offset:offset + count * DAYS * 8])
+        if len(ledger.user_ids) != count or len(ledger.seconds) != count * DAYS:
+            raise ValueError("기록 파일이 잘렸습니다")
+        if sys.byteorder != "little":
+            ledger.user_ids.byteswap()
+            ledger.seconds.byteswap()
+        ledger.index = {user_id: slot for slot, user_id in enumerate(ledger.user_ids)}
+        return ledger, generation
+
+    @classmethod
+    def from_week_dict(cls, user_total_time):
+        ledger = cls()
+        for day, records in user_total_time.items():
+            for user_id, seconds in records.items():
+                ledger.credit(int(user_id), int(day), seconds)
+        return ledger
@@ -0,0 +1,36 @@
+import asyncio
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+MAX_HEADERS = 100
+
+
+async def serve(host, port, route):
+    # 로컬 조회용 최소 HTTP/1.1 서버. route(method, path, headers) -> (status, headers, body)
+    async def handle(reader, writer):
+        try:
+            request = await reader.readline()
+            headers = {}
+            for _ in range(MAX_HEADERS):
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request.decode("latin-1").split()
+            if len(parts) < 2:
+                return
+            status, response_headers, body = route(parts[0], parts[1].split("?", 1)[0], headers)
+
+            head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}"]
+            head.extend(f"{name}: {value}" for name, value in response_headers.items())
+            head.append(f"Content-Length: {len(body)}")
+            head.append("Connection: close")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        except Exception as e:
+            print(f"[ERROR] HTTP 요청 처리 실패: {e}")
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+from member_index import MemberNameIndex
+
+MEMBER_CACHE_SIZE = 1024
+QUERY_BATCH = 100
+SEARCH_LIMIT = 25
+
+
+class MemberCache:
+    # 시작할 때 멤버 전체를 받지 않는 모드에서 쓰는 LRU. 없는 멤버는 query_members로 100명씩 묶어 받아 온다.
+    # 받아 온 멤버는 discord.py 캐시에 넣지 않고 여기에만 capacity개까지 둔다.
+
+    def __init__(self, capacity=MEMBER_CACHE_SIZE):
+        self.capacity = capacity
+        self.members = OrderedDict()
+
+    def __len__(self):
+        return len(self.members)
+
+    def get(self, user_id: int):
+        member = self.members.get(user_id)
+        if member is not None:
+            self.members.move_to_end(user_id)
+        return member
+
+    def put(self, member):
+        self.members[member.id] = member
+        self.members.move_to_end(member.id)
+        while len(self.members) > self.capacity:
+            self.members.popitem(last=False)
+
+    def discard(self, user_id: int):
+        self.members.pop(user_id, None)
+
+    async def resolve(self, guild, user_ids):
+        found = {}
+        missing = []
+        for user_id in user_ids:
+            member = self.get(user_id) or guild.get_member(user_id)
+            if member is None:
+                missing.append(user_id)
+            else:
+                found[user_id] = member
+
+        for i in range(0, len(missing), QUERY_BATCH):
+            batch = missing[i:i + QUERY_BATCH]
+            try:
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=False)
+            except Exception as e:
+                print(f"[ERROR] 멤버 정보 불러오기 실패: {e}")
+                continue
+            for member in members:
+                self.put(member)
+                found[member.id] = member
+        return found
+
+    async def search(self, guild, name: str):
+        # 게이트웨이 검색은 이름 앞부분 일치만 지원하므로, 받아 온 후보 안에서 기존 규칙대로 다시 고른다
+        key = name.strip()
+        if not key:
+            return None, "이름이 비어있음"
+        try:
+            members = await guild.query_members(query=key, limit=SEARCH_LIMIT, cache=False)
+        except Exception as e:
+            print(f"[ERROR] 멤버 검색 실패: {e}")
+            return None, "대상 없음"
+
+        index = MemberNameIndex()
+        index.build(members)
+        for member in members:
+            self.put(member)
+        return index.find(key)
@@ -0,0 +1,89 @@
+class MemberNameIndex:
+    # 정확히 일치: 소문자 이름 -> 멤버 ID 집합
+    # 부분 일치: 글자(1-gram), 두 글자(2-gram) -> 멤버 ID 집합, 후보를 좁힌 뒤 실제 포함 여부를 확인한다.
+
+    def __init__(self):
+        self.members = {}
+        self.names = {}
+        self.exact = {}
+        self.grams = {}
+
+    def build(self, members):
+        self.members = {}
+        self.names = {}
+        self.exact = {}
+        self.grams = {}
+        for member in members:
+            self.add(member)
+
+    def add(self, member):
+        if member.bot:
+            return
+        if member.id in self.members:
+            self.remove(member.id)
+
+        names = {(member.display_name or "").lower(), (member.name or "").lower()}
+        names.discard("")
+        self.members[member.id] = member
+        self.names[member.id] = names
+        for name in names:
+            self.exact.setdefault(name, set()).add(member.id)
+            for gram in self._grams(name):
+                self.grams.setdefault(gram, set()).add(member.id)
+
+    def remove(self, member_id):
+        self.members.pop(member_id, None)
+        for name in self.names.pop(member_id, ()):
+            self._discard(self.exact, name, member_id)
+            for gram in self._grams(name):
+                self._discard(self.grams, gram, member_id)
+
+    def update(self, member):
+        self.remove(member.id)
+        self.add(member)
+
+    def __contains__(self, member_id):
+        return member_id in self.members
+
+    def find(self, name: str):
+        key = name.strip().lower()
+        if not key:
+            return None, "이름이 비어있음"
+
+        exact = self.exact.get(key, ())
+        if len(exact) == 1:
+            return self.members[next(iter(exact))], None
+        if len(exact) > 1:
+            return None, "동일한 이름이 여러명"
+
+        partial = [
+            member_id
+            for member_id in self._candidates(key)
+            if any(key in n for n in self.names[member_id])
+        ]
+        if len(partial) == 1:
+            return self.members[partial[0]], None
+        if len(partial) > 1:
+            return None, "비슷한 이름이 여러명"
+
+        return None, "대상 없음"
+
+    def _candidates(self, key):
+        grams = {key[i:i + 2] for i in range(len(key) - 1)} if len(key) >= 2 else {key}
+        sets = sorted((self.grams.get(gram, set()) for gram in grams), key=len)
+        if not sets or not sets[0]:
+            return set()
+        return sets[0].intersection(*sets[1:])
+
+    def _grams(self, name):
+        grams = set(name)
+        grams.update(name[i:i + 2] for i in range(len(name) - 1))
+        return grams
+
+    def _discard(self, index, key, member_id):
+        ids = index.get(key)
+        if ids is None:
+            return
+        ids.discard(member_id)
+        if not ids:
+            del index[key]
@@ -0,0 +1,158 @@
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+
+from localhttp import serve as serve_http
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LOOP_LAG_INTERVAL_SECONDS = 1.0
+PREFIX = "timecheck_"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+
+class Metrics:
+    # enabled가 False이면 모든 기록 함수가 첫 줄에서 돌아가고 time()은 공용 빈 컨텍스트를 돌려준다.
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self.gauges = {}
+        self.loop_lag = 0.0
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def time(self, name, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(name, labels)
+
+    @contextmanager
+    def _timer(self, name, labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    async def watch_loop_lag(self, interval=LOOP_LAG_INTERVAL_SECONDS):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            if self.enabled:
+                self.loop_lag = max(0.0, loop.time() - expected)
+                self.observe("event_loop_lag_seconds", self.loop_lag)
+
+    def render_prometheus(self):
+        lines = []
+        typed = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_labels(labels, le=repr(bound))} {cumulative}")
+            lines.append(f"{metric}_bucket{_labels(labels, le='+Inf')} {histogram.count}")
+            lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        for (name, labels), value in sorted(self.counters.items()):
+            metric = PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for name, read in sorted(self.gauges.items()):
+            metric = PREFIX + name
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {read()}")
+        return "\n".join(lines) + "\n"
+
+    def summary_lines(self):
+        lines = []
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            label = ",".join(f"{k}={v}" for k, v in labels)
+            title = f"{name}[{label}]" if label else name
+            lines.append(
+                f"`{title}` n={histogram.count} 평균={histogram.sum / histogram.count * 1000:.2f}ms "
+                f"p50≤{histogram.quantile(0.5) * 1000:g}ms p99≤{histogram.quantile(0.99) * 1000:g}ms"
+            )
+        for (name, labels), value in sorted(self.counters.items()):
+            label = ",".join(f"{k}={v}" for k, v in labels)
+            lines.append(f"`{name}[{label}]` {value}" if label else f"`{name}` {value}")
+        for name, read in sorted(self.gauges.items()):
+            lines.append(f"`{name}` {read()}")
+        return lines
+
+    async def serve(self, host, port):
+        return await serve_http(host, port, self._route)
+
+    def _route(self, method, path, headers):
+        if method == "GET" and path == "/metrics":
+            return 200, {"Content-Type": "text/plain; version=0.0.4"}, self.render_prometheus().encode()
+        return 404, {"Content-Type": "text/plain"}, b"not found\n"
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+METRICS = Metrics()
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+from metrics import METRICS
+from render import paginate
+
+DIGEST_WINDOW_SECONDS = 3.0
+CHANNEL_RATE = 5
+CHANNEL_RATE_PER_SECONDS = 5.0
+
+
+class RateBucket:
+    def __init__(self, rate=CHANNEL_RATE, per=CHANNEL_RATE_PER_SECONDS):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * self.per / self.rate)
+
+
+class Outbox:
+    # 핸들러는 notify()로 한 줄을 넣고 바로 돌아간다. 채널마다 작업 하나가 창(window) 동안 모인
+    # 줄을 한 메시지(길면 여러 페이지)로 묶어 채널별 속도 제한에 맞춰 보낸다.
+
+    def __init__(self, resolve_channel, window=DIGEST_WINDOW_SECONDS):
+        self.resolve_channel = resolve_channel
+        self.window = window
+        self.queues = {}
+        self.buckets = {}
+        self.tasks = {}
+
+    def notify(self, channel_id, line):
+        if channel_id is None:
+            return
+        self.queues.setdefault(channel_id, []).append(line)
+        if channel_id not in self.tasks:
+            self.tasks[channel_id] = asyncio.get_running_loop().create_task(self._drain(channel_id))
+
+    def pending(self):
+        return sum(len(lines) for lines in self.queues.values())
+
+    async def flush(self):
+        tasks = list(self.tasks.values())
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _drain(self, channel_id):
+        try:
+            while True:
+                await asyncio.sleep(self.window)
+                lines = self.queues.pop(channel_id, None)
+                if not lines:
+                    return
+
+                channel = self.resolve_channel(channel_id)
+                if channel is None:
+                    continue
+
+                bucket = self.buckets.setdefault(channel_id, RateBucket())
+                for page in paginate(lines):
+                    await bucket.acquire()
+                    try:
+                        with METRICS.time("outbound_send_seconds"):
+                            await channel.send(page)
+                    except Exception as e:
+                        print(f"[ERROR] 알림 전송 실패: {e}")
+        finally:
+            self.tasks.pop(channel_id, None)
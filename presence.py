@@ -0,0 +1,48 @@
+class VoicePresence:
+    # 음성 이벤트로 직접 갱신하는 접속 현황. 유저 -> 채널 ID, 채널 ID -> 유저 ID 집합.
+    # 실제 채널 상태와는 시작할 때와 재연결 뒤(on_ready)에만 sync()로 다시 맞춘다. 봇은 넣지 않는다.
+
+    def __init__(self):
+        self.channels = {}
+        self.members = {}
+
+    def sync(self, voice_channels):
+        self.channels = {}
+        self.members = {}
+        for vc in voice_channels:
+            for member in vc.members:
+                if not member.bot:
+                    self.move(member.id, vc.id)
+
+    def move(self, user_id, channel_id):
+        previous = self.channels.get(user_id)
+        if previous == channel_id:
+            return previous
+        if previous is not None:
+            self._discard(previous, user_id)
+        if channel_id is None:
+            self.channels.pop(user_id, None)
+        else:
+            self.channels[user_id] = channel_id
+            self.members.setdefault(channel_id, set()).add(user_id)
+        return previous
+
+    def channel_of(self, user_id):
+        return self.channels.get(user_id)
+
+    def users_in(self, channel_id):
+        return self.members.get(channel_id, ())
+
+    def count(self, channel_id):
+        return len(self.members.get(channel_id, ()))
+
+    def users(self):
+        return self.channels.keys()
+
+    def _discard(self, channel_id, user_id):
+        users = self.members.get(channel_id)
+        if users is None:
+            return
+        users.discard(user_id)
+        if not users:
+            del self.members[channel_id]
@@ -0,0 +1,56 @@
+MESSAGE_LIMIT = 2000
+
+
+def paginate(lines, limit=MESSAGE_LIMIT):
+    chunk = []
+    size = 0
+    for line in lines:
+        while len(line) > limit:
+            if chunk:
+                yield "\n".join(chunk)
+                chunk = []
+                size = 0
+            yield line[:limit]
+            line = line[limit:]
+
+        added = len(line) + (1 if chunk else 0)
+        if chunk and size + added > limit:
+            yield "\n".join(chunk)
+            chunk = []
+            size = 0
+            added = len(line)
+
+        chunk.append(line)
+        size += added
+
+    if chunk:
+        yield "\n".join(chunk)
+
+
+def join_items(prefix, items, empty="없음", sep=", ", limit=MESSAGE_LIMIT):
+    parts = [prefix]
+    size = len(prefix)
+    first = True
+    for item in items:
+        piece = item if first else sep + item
+        if not first and size + len(piece) > limit:
+            yield "".join(parts)
+            parts = []
+            size = 0
+            piece = item
+        parts.append(piece)
+        size += len(piece)
+        first = False
+
+    if first:
+        parts.append(empty)
+    yield "".join(parts)
+
+
+def format_duration(seconds):
+    return f"{seconds // 3600}시간 {seconds % 3600 // 60}분"
+
+
+async def send_paginated(channel, lines, limit=MESSAGE_LIMIT):
+    for page in paginate(lines, limit):
+        await channel.send(page)
@@ -0,0 +1,507 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import TimeCheck
+from bucketing import bucket_sessions, split_session
+from weekly import RESULT_FAIL, RESULT_SUCCESS, is_week_successful
+
+# 트레이스 파일: 한 줄에 이벤트 하나, 시각 순서대로
+#   {"t": "2025-03-03T09:00:00+09:00", "type": "join", "user": 1, "channel": 1}
+#   {"t": ..., "type": "move", "user": 1, "channel": 2}
+#   {"t": ..., "type": "mute", "user": 1}                       채널이 그대로인 변경
+#   {"t": ..., "type": "leave", "user": 1}
+#   {"t": ..., "type": "message", "user": 1, "content": "!현재상황"}
+#   {"t": ..., "type": "down"} / {"t": ..., "type": "up"}       봇 종료/재시작 (사이의 음성 변경은 봇이 못 본다)
+#   {"t": ..., "type": "expect", "ledger": {"1": [초 x 7]}, "active": [1]}
+# 봇은 가상 시계로 돌리고, 같은 이벤트를 단순한 기준 모델에도 넣어 주 마감 결과와 최종 기록을 비교한다.
+
+KST = timezone(timedelta(hours=9))
+MIN_SESSION = timedelta(minutes=20)
+VOICE_CHANNEL_BASE = 5000
+GENERATED_CHANNELS = 4
+MAX_REPORTED_FAILURES = 20
+
+
+class FakePermissions:
+    administrator = False
+    manage_guild = False
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+        self.members = []
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, content=None, **kwargs):
+        self.sent += 1
+
+
+class FakeMember:
+    def __init__(self, user_id, guild):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.display_name = self.name
+        self.bot = False
+        self.guild = guild
+        self.mention = f"<@{user_id}>"
+        self.guild_permissions = FakePermissions()
+        self.voice = None
+        self.channel = None
+
+
+class FakeVoiceState:
+    def __init__(self, channel):
+        self.channel = channel
+
+
+class FakeMessage:
+    def __init__(self, content, author, channel):
+        self.content = content
+        self.author = author
+        self.channel = channel
+        self.guild = author.guild
+        self.mentions = []
+        self.channel_mentions = []
+
+
+class FakeGuild:
+    def __init__(self, guild_id, user_ids):
+        self.id = guild_id
+        self.afk_channel = None
+        self.channels = {}
+        self.by_id = {user_id: FakeMember(user_id, self) for user_id in user_ids}
+        self.members = list(self.by_id.values())
+
+    @property
+    def voice_channels(self):
+        return list(self.channels.values())
+
+    def voice_channel(self, number):
+        channel = self.channels.get(number)
+        if channel is None:
+            channel = self.channels[number] = FakeChannel(VOICE_CHANNEL_BASE + number)
+        return channel
+
+    def get_member(self, user_id):
+        return self.by_id.get(user_id)
+
+
+def split_days(start, end):
+    # 기준 모델: 자정마다 끊어 요일별로 더하는 예전 방식 그대로
+    days = [0] * 7
+    current = start
+    while current < end:
+        midnight = (current + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        stop = min(midnight, end)
+        days[current.weekday()] += int((stop - current).total_seconds())
+        current = stop
+    return days
+
+
+class ReferenceModel:
+    def __init__(self, user_ids):
+        self.roster = set(user_ids)
+        self.sessions = {}
+        self.voice = set()
+        self.ledger = {}
+
+    def credit(self, user_id, days):
+        if not any(days):
+            return
+        row = self.ledger.setdefault(user_id, [0] * 7)
+        for day, seconds in enumerate(days):
+            row[day] += seconds
+
+    def join(self, user_id, when, up):
+        self.voice.add(user_id)
+        if up:
+            self.sessions[user_id] = when
+
+    def leave(self, user_id, when, up):
+        self.voice.discard(user_id)
+        if not up:
+            return
+        join_time = self.sessions.pop(user_id, None)
+        if join_time is not None and when - join_time >= MIN_SESSION:
+            self.credit(user_id, split_days(join_time, when))
+
+    def flush_until(self, cutoff):
+        for user_id, join_time in list(self.sessions.items()):
+            if join_time < cutoff and cutoff - join_time >= MIN_SESSION:
+                self.credit(user_id, split_days(join_time, cutoff))
+            self.sessions[user_id] = cutoff
+
+    def boot(self, when):
+        for user_id, join_time in list(self.sessions.items()):
+            if user_id in self.voice:
+                continue
+            del self.sessions[user_id]
+            if when - join_time >= MIN_SESSION:
+                self.credit(user_id, split_days(join_time, when))
+        for user_id in self.voice - self.sessions.keys():
+            self.sessions[user_id] = when
+
+    def command(self, content, user_id, when):
+        name, _, args = content[1:].partition(" ")
+        if name == "시간추가":
+            if int(args) <= TimeCheck.MAX_ADD_MINUTES:
+                self.credit(user_id, [int(args) * 60 if day == when.weekday() else 0 for day in range(7)])
+        elif name == "현재상황":
+            self.flush_until(when.replace(second=0, microsecond=0))
+
+    def close_week(self, target):
+        self.flush_until(target)
+        rows = {}
+        for user_id in self.roster | self.ledger.keys():
+            days = self.ledger.get(user_id)
+            if days is None:
+                rows[user_id] = ([0] * 7, RESULT_FAIL)
+            else:
+                rows[user_id] = (days, RESULT_SUCCESS if is_week_successful(days) else RESULT_FAIL)
+        self.ledger = {}
+        return rows
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Replay:
+    def __init__(self, user_ids):
+        self.guild = FakeGuild(TimeCheck.GUILD_ID, user_ids)
+        self.report = FakeChannel(TimeCheck.CHANNEL_ID)
+        self.reference = ReferenceModel(user_ids)
+        self.virtual = None
+        self.bot = None
+        self.gs = None
+        self.next_rollover = None
+        self.first = None
+        self.events = 0
+        self.notices = 0
+        self.weeks = 0
+        self.latencies = {}
+        self.failures = []
+
+    def get_channel(self, channel_id):
+        if channel_id == self.report.id:
+            return self.report
+        return self.guild.channels.get(channel_id - VOICE_CHANNEL_BASE)
+
+    def notify(self, channel_id, line):
+        self.notices += 1
+
+    async def boot(self):
+        bot = TimeCheck.VoiceTrackerBot(intents=TimeCheck.build_intents(), clock=lambda: self.virtual)
+        bot.loop = asyncio.get_running_loop()
+        bot.get_guild = lambda guild_id: self.guild if guild_id == self.guild.id else None
+        bot.get_channel = self.get_channel
+        bot.router.clock = lambda: self.virtual.timestamp()
+        bot.outbox.notify = self.notify
+
+        gs = bot.guild_states[TimeCheck.GUILD_ID]
+        gs.state.debounce = 3600
+        bot.load_guild_members(gs, self.guild)
+        await bot.send_boot_report(gs, bot.recover_join_times_on_boot(gs))
+        self.bot, self.gs = bot, gs
+
+    async def shutdown(self):
+        await self.gs.state.flush()
+        self.bot = self.gs = None
+
+    def fail(self, message):
+        self.failures.append(f"[{self.virtual.isoformat()}] {message}")
+
+    def timed(self, name, started):
+        self.latencies.setdefault(name, []).append(time.perf_counter() - started)
+
+    async def advance(self, when):
+        while when >= self.next_rollover:
+            target = self.next_rollover
+            self.virtual = target
+            # 봇이 꺼져 있던 마감은 봇도 건너뛰므로 기준 모델도 마감하지 않는다
+            if self.bot is not None:
+                await self.bot.close_week(self.gs, target)
+                self.check_week(target, self.reference.close_week(target))
+                self.weeks += 1
+            self.next_rollover = target + timedelta(days=7)
+
+    def check_week(self, target, expected):
+        week_start = (target - timedelta(days=7)).date()
+        actual = {r.user_id: (list(r.day_seconds), r.result) for r in self.gs.archive.week_records(week_start)}
+        if actual != expected:
+            for user_id in sorted(actual.keys() | expected.keys()):
+                if actual.get(user_id) != expected.get(user_id):
+                    self.fail(f"{week_start} 주 마감 불일치 user={user_id}: 봇 {actual.get(user_id)} / 기준 {expected.get(user_id)}")
+
+    def check_state(self, user_ids=None, active=None):
+        ledger = {user_id: days for user_id, days in self.gs.state.ledger.items() if any(days)}
+        for user_id in user_ids if user_ids is not None else ledger.keys() | self.reference.ledger.keys():
+            if ledger.get(user_id) != self.reference.ledger.get(user_id):
+                self.fail(f"기록 불일치 user={user_id}: 봇 {ledger.get(user_id)} / 기준 {self.reference.ledger.get(user_id)}")
+        if active is not None and set(self.gs.state.user_join_times) != set(active):
+            self.fail(f"진행 중 세션 불일치: 봇 {sorted(self.gs.state.user_join_times)} / 기대 {sorted(active)}")
+
+    async def apply(self, event):
+        when = datetime.fromisoformat(event["t"])
+        if self.first is None:
+            self.first = self.virtual = when
+            await self.boot()
+            self.next_rollover = self.gs.next_summary_time(when)
+        await self.advance(when)
+        self.virtual = when
+        self.events += 1
+
+        kind = event["type"]
+        if kind in ("join", "move", "mute", "leave"):
+            await self.voice(kind, event, when)
+        elif kind == "message":
+            await self.message(event, when)
+        elif kind == "down":
+            if self.bot is not None:
+                await self.shutdown()
+        elif kind == "up":
+            if self.bot is None:
+                self.reference.boot(when)
+                await self.boot()
+        elif kind == "expect":
+            if self.bot is not None:
+                ledger = event.get("ledger", {})
+                for user_id, days in ledger.items():
+                    if self.reference.ledger.get(int(user_id)) != days:
+                        self.fail(f"기대값과 기준 모델 불일치 user={user_id}")
+                self.check_state([int(user_id) for user_id in ledger], event.get("active"))
+
+    async def voice(self, kind, event, when):
+        member = self.guild.get_member(event["user"])
+        before = member.channel
+        if kind in ("join", "move"):
+            after = self.guild.voice_channel(event["channel"])
+        elif kind == "mute":
+            after = before
+        else:
+            after = None
+
+        if before is not after:
+            if before is not None:
+                before.members.remove(member)
+            if after is not None:
+                after.members.append(member)
+            member.channel = after
+            up = self.bot is not None
+            if before is None:
+                self.reference.join(member.id, when, up)
+            elif after is None:
+                self.reference.leave(member.id, when, up)
+
+        if self.bot is not None:
+            started = time.perf_counter()
+            await self.bot.on_voice_state_update(member, FakeVoiceState(before), FakeVoiceState(after))
+            self.timed("on_voice_state_update", started)
+
+    async def message(self, event, when):
+        if self.bot is None:
+            return
+        member = self.guild.get_member(event["user"])
+        started = time.perf_counter()
+        accepted = await self.bot.router.dispatch(FakeMessage(event["content"], member, self.report))
+        self.timed("on_message", started)
+        if accepted:
+            self.reference.command(event["content"], member.id, when)
+
+    async def finish(self):
+        if self.bot is not None:
+            self.check_state()
+            sessions = {user_id: when for user_id, when in self.gs.state.user_join_times.items()}
+            if sessions != self.reference.sessions:
+                self.fail("진행 중 세션 시작 시각 불일치")
+            await self.gs.state.flush()
+
+
+def read_trace(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def trace_users(path):
+    return sorted({event["user"] for event in read_trace(path) if "user" in event})
+
+
+def run_trace(path):
+    # 데이터 파일은 임시 폴더에 쓰므로 상대 경로는 옮기기 전에 풀어 둔다
+    path = os.path.abspath(path)
+    user_ids = trace_users(path)
+    with tempfile.TemporaryDirectory() as data_dir:
+        cwd = os.getcwd()
+        os.chdir(data_dir)
+        try:
+            async def main():
+                replay = Replay(user_ids)
+                started = time.perf_counter()
+                for event in read_trace(path):
+                    await replay.apply(event)
+                await replay.finish()
+                elapsed = time.perf_counter() - started
+                for task in asyncio.all_tasks() - {asyncio.current_task()}:
+                    task.cancel()
+                return replay, elapsed
+
+            return asyncio.run(main())
+        finally:
+            os.chdir(cwd)
+
+
+def generate_trace(path, users, weeks, seed, start=datetime(2025, 3, 3, 6, 0, tzinfo=KST)):
+    # 유저마다 겹치지 않는 세션을 만들고, 중간에 채널 이동/음소거/명령/재부팅을 섞는다
+    rng = random.Random(seed)
+    end = start + timedelta(weeks=weeks)
+    events = []
+
+    def add(when, **event):
+        events.append((when, len(events), event))
+
+    for user_id in range(1, users + 1):
+        when = start + timedelta(minutes=rng.randint(0, 600))
+        while True:
+            when += timedelta(minutes=rng.randint(30, 20 * 60), seconds=rng.randint(0, 59))
+            duration = timedelta(minutes=rng.randint(3, 6 * 60), seconds=rng.randint(0, 59))
+            if when + duration >= end:
+                break
+            channel = rng.randrange(GENERATED_CHANNELS)
+            add(when, type="join", user=user_id, channel=channel)
+            if rng.random() < 0.3:
+                add(when + duration * rng.random(), type="mute", user=user_id)
+            if rng.random() < 0.2:
+                moved = (channel + rng.randrange(1, GENERATED_CHANNELS)) % GENERATED_CHANNELS
+                add(when + duration / 2, type="move", user=user_id, channel=moved)
+            add(when + duration, type="leave", user=user_id)
+            when += duration
+
+        when = start
+        while True:
+            when += timedelta(hours=rng.randint(6, 48), minutes=rng.randint(0, 59))
+            if when >= end:
+                break
+            if rng.random() < 0.5:
+                add(when, type="message", user=user_id, content=f"!시간추가 {rng.randint(1, 120)}")
+            else:
+                add(when, type="message", user=user_id, content="!현재상황")
+
+    # 주 마감(월요일 0시) 근처를 피해서 하루에 한 번꼴로 재부팅
+    for day in range(weeks * 7):
+        if rng.random() < 0.3:
+            down = start + timedelta(days=day, hours=rng.randint(2, 14), minutes=rng.randint(0, 59))
+            add(down, type="down")
+            add(down + timedelta(minutes=rng.randint(1, 90)), type="up")
+
+    events.sort(key=lambda item: (item[0], item[1]))
+    with open(path, "w", encoding="utf-8") as f:
+        for when, _, event in events:
+            f.write(json.dumps({"t": when.isoformat(), **event}, ensure_ascii=False) + "\n")
+    return len(events)
+
+
+def check_bucketing(intervals, seed, start=datetime(2024, 1, 1, tzinfo=KST)):
+    # 요일 나누기(bucketing.add_interval_us)를 자정 루프 기준 구현과 임의 구간으로 비교한다.
+    # 자정 경계에 딱 걸치는 구간, 1초 미만 구간, 몇 주짜리 구간이 섞이도록 만든다.
+    rng = random.Random(seed)
+    sessions = []
+    expected = {}
+    mismatches = 0
+    for i in range(intervals):
+        begin = start + timedelta(days=rng.randrange(3 * 365), microseconds=rng.randrange(86400 * 10**6))
+        if rng.random() < 0.1:
+            begin = begin.replace(hour=0, minute=0, second=0, microsecond=0)
+        shape = rng.random()
+        if shape < 0.1:
+            length = timedelta(microseconds=rng.randrange(10**6))
+        elif shape < 0.8:
+            length = timedelta(seconds=rng.randrange(86400), microseconds=rng.randrange(10**6))
+        else:
+            length = timedelta(days=rng.randrange(1, 30), seconds=rng.randrange(86400), microseconds=rng.randrange(10**6))
+        end = begin + length
+        if rng.random() < 0.1:
+            end = end.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        days = split_days(begin, end)
+        if split_session(begin, end) != days:
+            mismatches += 1
+            if mismatches <= MAX_REPORTED_FAILURES:
+                print(f"[MISMATCH] {begin.isoformat()} ~ {end.isoformat()}: {split_session(begin, end)} / 기준 {days}")
+        user_id = i % 97
+        sessions.append((user_id, begin, end))
+        if end > begin:
+            row = expected.setdefault(user_id, [0] * 7)
+            for day, seconds in enumerate(days):
+                row[day] += seconds
+
+    if bucket_sessions(sessions) != expected:
+        mismatches += 1
+        print("[MISMATCH] bucket_sessions 유저별 합계가 기준과 다릅니다")
+    print(f"구간 {intervals}개 비교: " + ("검증 통과" if not mismatches else f"검증 실패 {mismatches}건"))
+    return mismatches
+
+
+def report(replay, elapsed):
+    span = (replay.virtual - replay.first).total_seconds() if replay.first else 0
+    print(f"이벤트 {replay.events}개, 주 마감 {replay.weeks}번, 알림 {replay.notices}개")
+    print(f"가상 시간 {span / 86400:.1f}일 / 실제 {elapsed:.2f}초 ({replay.events / elapsed if elapsed else 0:.0f} events/s)")
+    for name, samples in sorted(replay.latencies.items()):
+        print(
+            f"{name:<24}{len(samples):>9}  p50 {percentile(samples, 0.5) * 1e6:8.1f}us"
+            f"  p95 {percentile(samples, 0.95) * 1e6:8.1f}us  p99 {percentile(samples, 0.99) * 1e6:8.1f}us"
+        )
+    for failure in replay.failures[:MAX_REPORTED_FAILURES]:
+        print(f"[MISMATCH] {failure}")
+    if len(replay.failures) > MAX_REPORTED_FAILURES:
+        print(f"... 외 {len(replay.failures) - MAX_REPORTED_FAILURES}건")
+    print("검증 통과" if not replay.failures else f"검증 실패 {len(replay.failures)}건")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TimeCheck 가상 시계 리플레이 하네스")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    gen = sub.add_parser("generate", help="임의 트레이스 생성")
+    gen.add_argument("trace")
+    gen.add_argument("--users", type=int, default=50)
+    gen.add_argument("--weeks", type=int, default=4)
+    gen.add_argument("--seed", type=int, default=1234)
+    gen.add_argument("--run", action="store_true", help="생성 후 바로 실행")
+
+    run = sub.add_parser("run", help="트레이스 실행 및 검증")
+    run.add_argument("trace")
+
+    bucketing = sub.add_parser("bucketing", help="요일 나누기를 자정 루프 기준 구현과 임의 구간으로 비교")
+    bucketing.add_argument("--intervals", type=int, default=50000)
+    bucketing.add_argument("--seed", type=int, default=1234)
+
+    args = parser.parse_args(argv)
+    if args.command == "bucketing":
+        return 1 if check_bucketing(args.intervals, args.seed) else 0
+
+    if args.command == "generate":
+        count = generate_trace(args.trace, args.users, args.weeks, args.seed)
+        print(f"트레이스 생성: {args.trace} ({count}개 이벤트)")
+        if not args.run:
+            return 0
+
+    replay, elapsed = run_trace(args.trace)
+    report(replay, elapsed)
+    return 1 if replay.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
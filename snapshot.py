@@ -0,0 +1,122 @@
+import asyncio
+import json
+import os
+from types import MappingProxyType
+
+from weekly import DAY_NAMES
+
+SNAPSHOT_INTERVAL_SECONDS = 1.0
+BOOT_ID = os.urandom(4).hex()
+
+
+class Snapshot:
+    # 발행된 뒤에는 바뀌지 않는 읽기 전용 상태. rows는 유저별 JSON 조각이고,
+    # 다음 스냅샷은 이전 rows를 복사해서 바뀐 유저의 조각만 새로 만든다.
+
+    __slots__ = ("guild_id", "version", "generated_at", "rows", "sessions", "excluded", "successful", "failed", "body", "etag")
+
+    def __init__(self, guild_id, version, generated_at, rows, sessions, excluded, successful, failed):
+        self.guild_id = guild_id
+        self.version = version
+        self.generated_at = generated_at
+        self.rows = MappingProxyType(rows)
+        self.sessions = sessions
+        self.excluded = excluded
+        self.successful = successful
+        self.failed = failed
+        self.etag = f'"{BOOT_ID}-{guild_id}-{version}"'
+        self.body = self.encode()
+
+    def encode(self):
+        head = {
+            "guild_id": str(self.guild_id),
+            "version": self.version,
+            "generated_at": self.generated_at,
+            "days": DAY_NAMES,
+        }
+        tail = {
+            "active_sessions": [
+                {"user_id": str(user_id), "since": since, "channel_id": str(channel_id) if channel_id is not None else None}
+                for user_id, since, channel_id in self.sessions
+            ],
+            "excluded": [str(user_id) for user_id in self.excluded],
+            "successful": [mention[2:-1] for mention in self.successful],
+            "failed": [mention[2:-1] for mention in self.failed],
+        }
+        return b"".join(
+            (
+                json.dumps(head, ensure_ascii=False)[:-1].encode(),
+                b', "users": [',
+                b", ".join(self.rows.values()),
+                b"], ",
+                json.dumps(tail, ensure_ascii=False)[1:].encode(),
+            )
+        )
+
+
+def encode_row(user_id, day_seconds):
+    return json.dumps({"user_id": str(user_id), "days": day_seconds, "total": sum(day_seconds)}).encode()
+
+
+def build_snapshot(previous, captured):
+    # 실행기 스레드에서 돈다. captured는 이벤트 루프에서 떠 온 값이라 살아 있는 상태를 건드리지 않는다.
+    guild_id, version, generated_at, changed, ledger, sessions, excluded, successful, failed = captured
+    if ledger is not None:
+        rows = {user_id: encode_row(user_id, day_seconds) for user_id, day_seconds in ledger.items()}
+    else:
+        rows = dict(previous.rows)
+        for user_id, day_seconds in changed:
+            if day_seconds is None:
+                rows.pop(user_id, None)
+            else:
+                rows[user_id] = encode_row(user_id, day_seconds)
+    return Snapshot(guild_id, version, generated_at, rows, sessions, excluded, successful, failed)
+
+
+class SnapshotPublisher:
+    def __init__(self, guild_id, state):
+        self.guild_id = guild_id
+        self.state = state
+        self.current = None
+
+    def stale(self):
+        return self.current is None or self.current.version != self.state.version
+
+    def capture(self, now):
+        # await 없이 한 번에 떠서 음성 이벤트 처리와 섞이지 않는다. 전체 재작성일 때만 기록 배열을 통째로 복사한다.
+        state = self.state
+        dirty = state.take_dirty()
+        if dirty is None or self.current is None:
+            ledger = state.ledger.copy()
+            changed = ()
+        else:
+            ledger = None
+            changed = [(user_id, state.ledger.user(user_id)) for user_id in dirty]
+        sessions = tuple(
+            (user_id, join_time.isoformat(), state.segments.get(user_id, [(None, None)])[-1][0])
+            for user_id, join_time in state.user_join_times.items()
+        )
+        return (
+            self.guild_id,
+            state.version,
+            now.isoformat(),
+            changed,
+            ledger,
+            sessions,
+            tuple(sorted(state.excluded_users)),
+            tuple(state.weekly.successful),
+            tuple(state.weekly.failed),
+        )
+
+    async def publish(self, now):
+        if not self.stale():
+            return False
+        captured = self.capture(now)
+        loop = asyncio.get_running_loop()
+        try:
+            self.current = await loop.run_in_executor(None, build_snapshot, self.current, captured)
+        except Exception as e:
+            self.state.dirty_all = True
+            print(f"[ERROR] 스냅샷 발행 실패: {e}")
+            return False
+        return True
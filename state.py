@@ -0,0 +1,257 @@
+import asyncio
+import json
+import sys
+import time
+from array import array
+
+from leaderboard import Leaderboard
+from ledger import TimeLedger
+from metrics import METRICS
+from storage import SessionLogStore, write_bytes_atomic, write_json_atomic
+from weekly import WeeklyResults
+
+FLUSH_DEBOUNCE_SECONDS = 2.0
+
+
+class StateManager:
+    def __init__(self, store: SessionLogStore, excluded_file, roster_file=None, debounce=FLUSH_DEBOUNCE_SECONDS):
+        self.store = store
+        self.excluded_file = excluded_file
+        self.roster_file = roster_file
+        self.debounce = debounce
+
+        self.user_join_times = {}
+        self.segments = {}
+        self.sessions_version = 0
+        # 스냅샷용 변경 추적: version은 모든 변경마다, dirty_users는 기록이 바뀐 유저
+        self.version = 0
+        self.dirty_users = set()
+        self.dirty_all = True
+        self.ledger = TimeLedger()
+        self.excluded_users = set()
+        self.weekly = WeeklyResults()
+        self.leaderboard = Leaderboard()
+
+        self._pending = []
+        self._excluded_dirty = False
+        self._roster_dirty = False
+        self._flush_handle = None
+        self._flush_tasks = set()
+        self._flush_lock = asyncio.Lock()
+
+    def load(self):
+        self.ledger, self.user_join_times = self.store.load()
+        self.segments = {user_id: [(None, when)] for user_id, when in self.user_join_times.items()}
+        self.sessions_version += 1
+        self._touch_all()
+        try:
+            with open(self.excluded_file, "r", encoding="utf-8") as f:
+                self.excluded_users = {int(user_id) for user_id in json.load(f)}
+        except FileNotFoundError:
+            self.excluded_users = set()
+        except Exception as e:
+            print(f"[ERROR] 제외 유저 로드 실패: {e}")
+            self.excluded_users = set()
+        self.weekly.rebuild(self.ledger, self.excluded_users, self.load_roster())
+        self.leaderboard.rebuild(self.ledger)
+
+    def load_roster(self):
+        # 멤버 ID 목록만 저장해 두고 "기록이 없으면 실패" 규칙에 쓴다. 파일이 없으면 None
+        if self.roster_file is None:
+            return None
+        try:
+            with open(self.roster_file, "rb") as f:
+                roster = array("Q", f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[ERROR] 멤버 목록 로드 실패: {e}")
+            return None
+        if sys.byteorder != "little":
+            roster.byteswap()
+        return roster
+
+    def set_roster(self, member_ids):
+        member_ids = set(member_ids)
+        if member_ids != self.weekly.roster:
+            self.weekly.set_roster(member_ids)
+            self._mark_roster_dirty()
+            self._touch()
+
+    def add_member(self, user_id: int):
+        self.weekly.add_member(user_id)
+        self._mark_roster_dirty()
+        self._touch()
+
+    def remove_member(self, user_id: int):
+        self.weekly.remove_member(user_id)
+        self._mark_roster_dirty()
+        self._touch()
+
+    def _mark_roster_dirty(self):
+        if self.roster_file is not None:
+            self._roster_dirty = True
+            self._schedule_flush()
+
+    def start_session(self, user_id: int, when, channel_id=None):
+        self.user_join_times[user_id] = when
+        self.segments[user_id] = [(channel_id, when)]
+        self.sessions_version += 1
+        self._touch()
+        self._record(["j", str(user_id), when.isoformat()])
+
+    def move_session(self, user_id: int, channel_id, when):
+        # 채널 구간은 메모리에만 둔다. 재시작하면 세션 시작 시각만 로그에서 복구된다.
+        segments = self.segments.get(user_id)
+        if segments is None:
+            return
+        if segments[-1][0] is None:
+            segments[-1] = (channel_id, segments[-1][1])
+        elif segments[-1][0] != channel_id:
+            segments.append((channel_id, when))
+            self.sessions_version += 1
+            self._touch()
+
+    def end_session(self, user_id: int):
+        self.segments.pop(user_id, None)
+        join_time = self.user_join_times.pop(user_id, None)
+        if join_time is not None:
+            self.sessions_version += 1
+            self._touch()
+            self._record(["l", str(user_id)])
+        return join_time
+
+    def credit(self, user_id: int, weekday: int, seconds: int, manual=False):
+        self.ledger.credit(user_id, weekday, seconds)
+        self.weekly.refresh(user_id)
+        self.leaderboard.refresh(user_id)
+        self._touch(user_id)
+        self._record(["m" if manual else "c", user_id, weekday, seconds])
+
+    def credit_days(self, user_id: int, day_seconds):
+        for weekday, seconds in enumerate(day_seconds):
+            if seconds > 0:
+                self.ledger.credit(user_id, weekday, seconds)
+                self._record(["c", user_id, weekday, seconds])
+        self.weekly.refresh(user_id)
+        self.leaderboard.refresh(user_id)
+        self._touch(user_id)
+
+    def reset_all(self):
+        self.ledger.clear()
+        self.excluded_users.clear()
+        self._excluded_dirty = True
+        self.weekly.reset_all()
+        self.leaderboard.rebuild(self.ledger)
+        self._touch_all()
+        self._record(["r"])
+
+    def reset_user(self, user_id: int):
+        self.ledger.remove(user_id)
+        if user_id in self.excluded_users:
+            self.excluded_users.discard(user_id)
+            self._excluded_dirty = True
+        self.weekly.reset_user(user_id)
+        self.leaderboard.refresh(user_id)
+        self._touch(user_id)
+        self._record(["ru", user_id])
+
+    def exclude(self, user_id: int):
+        self.excluded_users.add(user_id)
+        self._excluded_dirty = True
+        self.weekly.exclude(user_id)
+        self._touch()
+        self._schedule_flush()
+
+    def include(self, user_id: int):
+        self.excluded_users.discard(user_id)
+        self._excluded_dirty = True
+        self.weekly.include(user_id)
+        self._touch()
+        self._schedule_flush()
+
+    def _touch(self, user_id=None):
+        self.version += 1
+        if user_id is not None:
+            self.dirty_users.add(user_id)
+
+    def _touch_all(self):
+        self.version += 1
+        self.dirty_all = True
+        self.dirty_users = set()
+
+    def take_dirty(self):
+        dirty = None if self.dirty_all else self.dirty_users
+        self.dirty_all = False
+        self.dirty_users = set()
+        return dirty
+
+    def _record(self, record):
+        self._pending.append(record)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(self.debounce, self._start_flush)
+
+    def _start_flush(self):
+        # 작업 참조를 들고 있어야 도중에 GC되지 않고, 실패도 로그로 남는다
+        task = asyncio.get_running_loop().create_task(self._background_flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _background_flush(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"[ERROR] 기록 저장 실패: {e}")
+
+    async def flush(self, compact=False):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        async with self._flush_lock:
+            records, self._pending = self._pending, []
+            excluded = [str(user_id) for user_id in sorted(self.excluded_users)] if self._excluded_dirty else None
+            self._excluded_dirty = False
+            roster = array("Q", sorted(self.weekly.roster)) if self._roster_dirty else None
+            self._roster_dirty = False
+
+            snapshot = None
+            if compact or self.store.should_compact(len(records)):
+                snapshot = (self.ledger.copy(), dict(self.user_join_times))
+
+            if not records and excluded is None and roster is None and snapshot is None:
+                return
+
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            written = await loop.run_in_executor(None, self._write, records, excluded, roster, snapshot)
+            METRICS.observe("persistence_write_seconds", time.perf_counter() - started)
+            METRICS.inc("persistence_bytes_written_total", written)
+
+    def _write(self, records, excluded, roster, snapshot):
+        written = self.store.append(*records)
+        if excluded is not None:
+            try:
+                write_json_atomic(self.excluded_file, excluded, indent=4)
+            except Exception as e:
+                print(f"[ERROR] 제외 유저 저장 실패: {e}")
+        if roster is not None:
+            if sys.byteorder != "little":
+                roster.byteswap()
+            try:
+                data = roster.tobytes()
+                write_bytes_atomic(self.roster_file, data)
+                written += len(data)
+            except Exception as e:
+                print(f"[ERROR] 멤버 목록 저장 실패: {e}")
+        if snapshot is not None:
+            written += self.store.compact(*snapshot)
+        return written
@@ -0,0 +1,57 @@
+import json
+
+from localhttp import serve as serve_http
+from metrics import METRICS
+
+JSON_TYPE = "application/json; charset=utf-8"
+
+
+class StatsApi:
+    # 읽기 전용 로컬 API. 발행된 스냅샷의 바이트를 그대로 돌려주고, ETag가 같으면 304만 보낸다.
+    #   GET /guilds                  서버 목록과 스냅샷 버전
+    #   GET /guilds/<서버 ID>/stats  서버 스냅샷 전체
+
+    def __init__(self, guild_states):
+        self.guild_states = guild_states
+
+    async def serve(self, host, port):
+        return await serve_http(host, port, self.route)
+
+    def route(self, method, path, headers):
+        status, response_headers, body = self._route(method, path, headers)
+        METRICS.inc("stats_api_requests_total", status=status)
+        return status, response_headers, body
+
+    def _route(self, method, path, headers):
+        if method != "GET":
+            return _error(405, "method not allowed")
+
+        parts = path.strip("/").split("/")
+        if parts == ["guilds"]:
+            guilds = [
+                {
+                    "guild_id": str(guild_id),
+                    "version": gs.snapshots.current.version if gs.snapshots.current else None,
+                    "stats": f"/guilds/{guild_id}/stats",
+                }
+                for guild_id, gs in list(self.guild_states.items())
+            ]
+            return 200, {"Content-Type": JSON_TYPE, "Cache-Control": "no-cache"}, json.dumps(guilds).encode()
+
+        if len(parts) != 3 or parts[0] != "guilds" or parts[2] != "stats" or not parts[1].isdecimal():
+            return _error(404, "not found")
+        gs = self.guild_states.get(int(parts[1]))
+        if gs is None:
+            return _error(404, "unknown guild")
+        snapshot = gs.snapshots.current
+        if snapshot is None:
+            return _error(503, "snapshot not ready")
+
+        tags = {tag.strip() for tag in headers.get("if-none-match", "").split(",")}
+        if snapshot.etag in tags or "*" in tags:
+            return 304, {"ETag": snapshot.etag}, b""
+        return 200, {"Content-Type": JSON_TYPE, "ETag": snapshot.etag, "Cache-Control": "no-cache"}, snapshot.body
+
+
+def _error(status, message):
+    return status, {"Content-Type": JSON_TYPE}, json.dumps({"error": message}).encode()
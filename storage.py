@@ -0,0 +1,175 @@
+import json
+import os
+from datetime import datetime
+
+from ledger import TimeLedger
+
+COMPACT_EVERY = 500
+
+
+def write_bytes_atomic(path, data):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_json_atomic(path, data, **kwargs):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class SessionLogStore:
+    # 로그 레코드 (한 줄에 하나, 압축 JSON 배열)
+    #   ["g", generation]              로그 헤더
+    #   ["j", uid, iso]                입장 / 세션 시작 시각 갱신
+    #   ["l", uid]                     퇴장
+    #   ["c", uid, weekday, seconds]   세션 적립
+    #   ["m", uid, weekday, seconds]   !시간추가 수동 적립
+    #   ["r"]                          전체 초기화
+    #   ["ru", uid]                    유저 초기화
+    # 스냅샷은 TimeLedger 바이너리 파일이고, 없으면 예전 JSON(voice_data.json)에서 옮겨 온다.
+
+    def __init__(self, ledger_file, join_file, log_file, legacy_data_file=None, compact_every=COMPACT_EVERY):
+        self.ledger_file = ledger_file
+        self.legacy_data_file = legacy_data_file
+        self.join_file = join_file
+        self.log_file = log_file
+        self.compact_every = compact_every
+        self.generation = 0
+        self.log_size = 0
+
+    def load(self, repair=True):
+        ledger = self.load_ledger()
+        user_join_times = {}
+
+        try:
+            with open(self.join_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for user_id_str, time_str in data.items():
+                try:
+                    user_join_times[int(user_id_str)] = datetime.fromisoformat(time_str)
+                except Exception:
+                    continue
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] 유저 입장 시간 파일 로드 실패: {e}")
+
+        self.log_size = 0
+        log_valid = False
+        try:
+            with open(self.log_file, "r", encoding="utf-8") as f:
+                header = self._parse(f.readline())
+                if header and header[0] == "g" and header[1] == self.generation:
+                    log_valid = True
+                    for line in f:
+                        record = self._parse(line)
+                        if record is None:
+                            continue
+                        apply_record(record, ledger, user_join_times)
+                        self.log_size += 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] 세션 로그 로드 실패: {e}")
+
+        if not log_valid and repair:
+            try:
+                write_log_header(self.log_file, self.generation)
+            except Exception as e:
+                print(f"[ERROR] 세션 로그 초기화 실패: {e}")
+
+        return ledger, user_join_times
+
+    def load_ledger(self):
+        try:
+            with open(self.ledger_file, "rb") as f:
+                ledger, self.generation = TimeLedger.from_bytes(f.read())
+            return ledger
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"[ERROR] 데이터 로드 실패: {e}")
+            return TimeLedger()
+
+        if self.legacy_data_file is None:
+            return TimeLedger()
+        try:
+            with open(self.legacy_data_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.generation = data.get("generation", 0)
+            return TimeLedger.from_week_dict(data.get("user_total_time", {}))
+        except FileNotFoundError:
+            return TimeLedger()
+        except Exception as e:
+            print(f"[ERROR] 데이터 로드 실패: {e}")
+            return TimeLedger()
+
+    def _parse(self, line):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record if isinstance(record, list) and record else None
+
+    def append(self, *records):
+        if not records:
+            return 0
+        data = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in records).encode("utf-8")
+        try:
+            with open(self.log_file, "ab") as f:
+                f.write(data)
+            self.log_size += len(records)
+            return len(data)
+        except Exception as e:
+            print(f"[ERROR] 세션 로그 기록 실패: {e}")
+            return 0
+
+    def should_compact(self, pending=0):
+        # pending: 아직 로그에 쓰지 않았지만 곧 쓸 레코드 수
+        return self.log_size + pending >= self.compact_every
+
+    def compact(self, ledger: TimeLedger, user_join_times):
+        generation = self.generation + 1
+        try:
+            write_json_atomic(
+                self.join_file,
+                {str(user_id): time.isoformat() for user_id, time in user_join_times.items()},
+            )
+            data = ledger.to_bytes(generation)
+            write_bytes_atomic(self.ledger_file, data)
+            self.generation = generation
+            write_log_header(self.log_file, generation)
+            self.log_size = 0
+            return len(data)
+        except Exception as e:
+            print(f"[ERROR] 스냅샷 저장 실패: {e}")
+            return 0
+
+
+def write_log_header(path, generation):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(["g", generation]) + "\n")
+    os.replace(tmp_path, path)
+
+
+def apply_record(record, ledger: TimeLedger, user_join_times):
+    op = record[0]
+    if op == "j":
+        user_join_times[int(record[1])] = datetime.fromisoformat(record[2])
+    elif op == "l":
+        user_join_times.pop(int(record[1]), None)
+    elif op in ("c", "m"):
+        ledger.credit(int(record[1]), int(record[2]), record[3])
+    elif op == "r":
+        ledger.clear()
+    elif op == "ru":
+        ledger.remove(int(record[1]))
@@ -0,0 +1,32 @@
+IGNORE = 0
+JOIN = 1
+LEAVE = 2
+MOVE = 3
+
+
+def channel_id_of(voice_state):
+    channel = voice_state.channel
+    return channel.id if channel is not None else None
+
+
+def classify(before_id, after_id, is_counted):
+    # 채널이 그대로인 변경(음소거, 헤드셋, 방송, 카메라)은 호출한 쪽에서 먼저 걸러낸다.
+    # 제외/잠수 채널은 음성 채널이 아닌 것처럼 다룬다.
+    was_counted = is_counted(before_id)
+    now_counted = is_counted(after_id)
+    if was_counted and now_counted:
+        return MOVE
+    if now_counted:
+        return JOIN
+    if was_counted:
+        return LEAVE
+    return IGNORE
+
+
+def split_segments(segments, end):
+    # [(채널 ID, 시작 시각), ...] -> [(채널 ID, 초), ...]. 같은 채널로 돌아온 구간은 합친다.
+    totals = {}
+    for i, (channel_id, start) in enumerate(segments):
+        stop = segments[i + 1][1] if i + 1 < len(segments) else end
+        totals[channel_id] = totals.get(channel_id, 0) + max(0, int((stop - start).total_seconds()))
+    return list(totals.items())
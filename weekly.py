@@ -0,0 +1,131 @@
+import bisect
+
+from ledger import TimeLedger
+
+DAY_NAMES = ["월", "화", "수", "목", "금", "토", "일"]
+
+SINGLE_DAY_MIN_SECONDS = 4 * 3600
+MULTI_DAY_MIN_SECONDS = 3600
+WEEKLY_MIN_SECONDS = 4 * 3600
+
+RESULT_FAIL = 0
+RESULT_SUCCESS = 1
+RESULT_EXCLUDED = 2
+
+
+def is_week_successful(day_seconds):
+    active = [seconds for seconds in day_seconds if seconds > 0]
+    threshold = SINGLE_DAY_MIN_SECONDS if len(active) == 1 else MULTI_DAY_MIN_SECONDS
+    valid = [seconds for seconds in active if seconds >= threshold]
+    return len(valid) >= 1 and sum(valid) >= WEEKLY_MIN_SECONDS
+
+
+class WeeklyResults:
+    # 적립/제외/초기화가 일어날 때마다 해당 유저의 주간 결과만 다시 계산해서
+    # 성공/실패 목록(멘션 문자열 기준 정렬)을 항상 최신 상태로 유지한다.
+
+    def __init__(self):
+        self.ledger = TimeLedger()
+        self.excluded = set()
+        self.roster = set()
+        self.status = {}
+        self.successful = []
+        self.failed = []
+
+    def rebuild(self, ledger: TimeLedger, excluded_users, roster=None):
+        self.ledger = ledger
+        self.excluded = set(excluded_users)
+        if roster is not None:
+            self.roster = set(roster)
+        self.status = {}
+        for user_id in set(ledger.index) | self.roster | self.excluded:
+            self._set_status(user_id)
+        self._sort_mentions()
+
+    def reset_all(self):
+        self.excluded = set()
+        for user_id in list(self.status):
+            self._set_status(user_id)
+        self._sort_mentions()
+
+    def reset_user(self, user_id: int):
+        self.excluded.discard(user_id)
+        self.refresh(user_id)
+
+    def exclude(self, user_id: int):
+        self.excluded.add(user_id)
+        self.refresh(user_id)
+
+    def include(self, user_id: int):
+        self.excluded.discard(user_id)
+        self.refresh(user_id)
+
+    def set_roster(self, member_ids):
+        old = self.roster
+        self.roster = set(member_ids)
+        for user_id in old ^ self.roster:
+            self._set_status(user_id)
+        self._sort_mentions()
+
+    def add_member(self, user_id: int):
+        self.roster.add(user_id)
+        self.refresh(user_id)
+
+    def remove_member(self, user_id: int):
+        self.roster.discard(user_id)
+        self.refresh(user_id)
+
+    def rows(self):
+        return [
+            (user_id, self.ledger.user(user_id) or [0] * 7, status)
+            for user_id, status in self.status.items()
+        ]
+
+    def _compute(self, user_id: int):
+        day_seconds = self.ledger.user(user_id)
+        if user_id in self.excluded:
+            return RESULT_EXCLUDED
+        if day_seconds is not None:
+            return RESULT_SUCCESS if is_week_successful(day_seconds) else RESULT_FAIL
+        if user_id in self.roster:
+            return RESULT_FAIL
+        return None
+
+    def _set_status(self, user_id: int):
+        # 일괄 갱신용: 상태만 바꾸고 목록은 _sort_mentions에서 한 번에 다시 만든다
+        status = self._compute(user_id)
+        if status is None:
+            self.status.pop(user_id, None)
+        else:
+            self.status[user_id] = status
+
+    def _sort_mentions(self):
+        self.successful = sorted(f"<@{user_id}>" for user_id, status in self.status.items() if status == RESULT_SUCCESS)
+        self.failed = sorted(f"<@{user_id}>" for user_id, status in self.status.items() if status == RESULT_FAIL)
+
+    def refresh(self, user_id: int):
+        status = self._compute(user_id)
+        old = self.status.get(user_id)
+        if old == status:
+            return
+
+        mention = f"<@{user_id}>"
+        if old == RESULT_SUCCESS:
+            self._remove(self.successful, mention)
+        elif old == RESULT_FAIL:
+            self._remove(self.failed, mention)
+
+        if status is None:
+            del self.status[user_id]
+            return
+
+        self.status[user_id] = status
+        if status == RESULT_SUCCESS:
+            bisect.insort(self.successful, mention)
+        elif status == RESULT_FAIL:
+            bisect.insort(self.failed, mention)
+
+    def _remove(self, mentions, mention):
+        i = bisect.bisect_left(mentions, mention)
+        if i < len(mentions) and mentions[i] == mention:
+            del mentions[i]